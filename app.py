@@ -1,21 +1,39 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 import os
-import json
 import sys
 import subprocess
 import html
 import textwrap
+import threading
 import streamlit.components.v1 as components
-from datetime import datetime
+from datetime import datetime, date
 from core.utils.time_utils import now_in_zone, set_process_tz
+from core.config import (
+    get_project_config, TOTAL_BACKEND, CHART_MODE, CHART_WEBGL_THRESHOLD, CHART_MAX_POINTS
+)
+from core.storage.total_store import load_total, data_version
+from core.processors.view_model import load_view, DashboardModel, transaction_table, TRANSACTION_COLUMNS
+from core.utils.serialization import load_file
+from core.utils.downsample import lttb_indices
+
+try:
+    # plotly >= 5.20 支持单个 fill 的原生渐变
+    go.Scatter(fillgradient=dict(type='vertical'))
+    HAS_FILLGRADIENT = True
+except ValueError:
+    HAS_FILLGRADIENT = False
 
 # 设置进程时区为 Asia/Shanghai（Unix 系统会调用 time.tzset）
 set_process_tz()
 
 def clear_cache():
-    st.cache_data.clear()
+    """强制下次访问时重新读取当前项目的数据"""
+    store = _data_store()
+    with store["lock"]:
+        store["items"] = {k: v for k, v in store["items"].items() if k[0] != st.session_state.get("project")}
 
 
 # ==========================================
@@ -339,18 +357,57 @@ st.markdown("""
 # 2. 数据加载与处理函数
 # ==========================================
 
-@st.cache_data(ttl=3600) # 缓存1小时
-def load_all_data(project: str = "house"):
-    """加载指定项目的完整 JSON 数据并转换为 DataFrame
-    project: 'house' 或 'warehouse'
+@st.cache_resource
+def _data_store():
+    """所有会话共用的数据缓存：{(project, 类型, ...): (数据版本, 数据)}"""
+    return {"lock": threading.RLock(), "items": {}}  # 可重入：loader 中可以再读取其他缓存项
+
+
+def _cached(key: tuple, loader):
+    """按项目数据版本缓存 loader() 的结果（key[0] 为项目）
+    数据文件更新后版本变化，下一次访问即重新读取；版本未变时直接返回缓存（调用方不要修改返回的对象）
+    """
+    version = data_version(key[0])
+    store = _data_store()
+    cached = store["items"].get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    with store["lock"]:
+        cached = store["items"].get(key)
+        if cached is None or cached[0] != version:
+            cached = (version, loader())
+            if version is not None:
+                store["items"][key] = cached
+    return cached[1]
+
+
+def load_all_data(project: str = "house", start: str = None, end: str = None):
+    """加载指定项目的数据（按数据版本缓存，所有会话共用）"""
+    return _cached((project, "frame", start, end), lambda: _read_all_data(project, start, end))
+
+
+def load_dashboard(project: str = "house") -> DashboardModel:
+    """加载指定项目的看板模型（基于 update_sales_data 生成的 view.json，按数据版本缓存）"""
+    return _cached((project, "dashboard"), lambda: DashboardModel(load_view(project)))
+
+
+def _read_all_data(project: str = "house", start: str = None, end: str = None):
+    """读取指定项目的数据并转换为 DataFrame
+    project: 'house' / 'warehouse' / 'parking'
+    start / end: 日期范围（YYYY-MM-DD，sqlite 后端下直接按范围查询）
     """
     file_path = os.path.join("data", project, "total.json")
-    if not os.path.exists(file_path):
+    # sqlite 数据库不存在时会在首次查询时由 total.json 导入
+    if not os.path.exists(file_path) and not (
+            TOTAL_BACKEND == "sqlite" and os.path.exists(get_project_config(project)["TOTAL_DB"])):
         return pd.DataFrame()  # 返回空DataFrame避免报错
 
     try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        if TOTAL_BACKEND == "sqlite":
+            data = list(load_total(project, start, end).values())
+        else:
+            data = [r for r in load_file(file_path) if (not start or r["日期"] >= start) and (not end or r["日期"] <= end)]
 
         df = pd.DataFrame(data)
         if not df.empty and '日期' in df.columns:
@@ -407,12 +464,6 @@ with st.sidebar:
     # 根据环境变量找出对应的显示标签（若未命中则默认为“住宅”）
     default_label = next((k for k, v in project_map.items() if v == default_proj), '住宅')
 
-    def _on_project_change():
-        st.cache_data.clear()
-        # 不直接修改与 selectbox 对应的 session_state（修改后可能导致 Streamlit 错误）
-        # 我们使用基于项目的 selectbox key（例如 selected_date_house / selected_date_warehouse / selected_date_parking）来避免冲突
-        # 仅清理缓存，组件会在下一次交互时依据当前项目自动显示正确的选项
-
     labels = list(project_map.keys())
     default_index = labels.index(default_label) if default_label in labels else 0
 
@@ -421,32 +472,28 @@ with st.sidebar:
         options=labels,
         index=default_index,
         key='project_label',
-        horizontal=True,
-        on_change=_on_project_change
+        horizontal=True
     )
     project = project_map[selected_label]
+    # 日期选择器等组件使用基于项目的 key（例如 date_input_house），切换项目时各自保留状态
+    st.session_state["project"] = project
 
     # 更新数据：已改为自动定时更新（见仓库 Actions）。手动更新按钮已移除，避免在 UI 中直接触发抓取。
+    # 数据按文件版本缓存，更新后自动生效；“刷新数据”仅用于强制重新读取当前项目
     st.button("刷新数据", on_click=clear_cache)
 
     st.divider()
 
-    # 2. 数据加载（按项目）
-    df_all = load_all_data(project)
+    # 2. 数据加载（按项目，使用预先计算的看板视图）
+    model = load_dashboard(project)
 
-    if df_all.empty:
+    if model.empty:
         st.warning(f"⚠️ 暂无数据，请先更新数据或检查 data/{project}/total.json")
         st.stop()  # 停止后续渲染
 
     # 3. 日期选择器（日历形式，智能验证）
-    # 获取数据日期范围
-    min_date = df_all['日期'].min().date()
-    max_date = df_all['日期'].max().date()
-    latest_date = df_all['日期'].max().date()
-    
-    # 获取所有有数据的日期集合
-    available_dates = set(df_all['日期'].dt.date)
-    
+    latest_date = date.fromisoformat(model.latest_date)
+
     # 初始化 session state
     date_key = f"date_input_{project}"
     temp_date_key = f"temp_clicked_date_{project}"
@@ -470,23 +517,16 @@ with st.sidebar:
     )
     
     # 验证选中的日期是否有数据
-    if selected_date not in available_dates:
-        # 找到最接近的有效日期
-        available_dates_list = sorted(available_dates)
-        closest_date = min(available_dates_list, key=lambda d: abs((d - selected_date).days))
-        
-        st.warning(f"⚠️ {selected_date} 暂无数据，显示最近的有效日期 {closest_date}")
-        selected_date = closest_date
-    
-    # 构造选中日期字符串
     selected_date_str = selected_date.strftime('%Y-%m-%d')
+    selected_idx = model.position(selected_date_str)
+    if selected_idx is None:
+        # 找到最接近的有效日期（二分查找，距离相同时取较早的日期）
+        selected_idx = model.nearest(selected_date)
+        closest_date = model.dates[selected_idx]
 
-    # 获取选中日期的数据行
-    selected_row = df_all[df_all['日期'].dt.strftime('%Y-%m-%d') == selected_date_str].iloc[0]
+        st.warning(f"⚠️ {selected_date} 暂无数据，显示最近的有效日期 {closest_date}")
+        selected_date_str = closest_date
 
-    # 获取最新数据行（用于顶部大指标）
-    latest_row = df_all.iloc[-1]
-    
     # 显示可用数据范围提示
     st.info(f"当前显示: {selected_date_str}")
     st.caption("数据来源: 北京住建委")
@@ -509,24 +549,12 @@ def render_metric(label, value, col):
     </div>
     """, unsafe_allow_html=True)
 
-with col1:
-    render_metric("累计签约套数", int(latest_row["已签约套数"]), st)
-with col2:
-    render_metric("累计签约面积 (㎡)", f"{latest_row['已签约面积(M2)']:,.1f}", st)
-with col3:
-    price_val = latest_row.get('成交均价(￥/M2)')
-    if pd.isna(price_val):
-        render_metric("累计成交均价", "N/A", st)
-    else:
-        render_metric("累计成交均价", f"¥{price_val:,.2f}", st)
+# 累计指标（取最新数据，已在 view.json 中格式化）
+for col, metric in zip((col1, col2, col3), model.kpi):
+    with col:
+        render_metric(metric["label"], metric["value"], st)
 with col4:
-    # 先提取所有有当日均价的记录（已在前面的 load_all_data 中转为数值 + NaN 处理）
-    valid_prices_df = df_all[
-        pd.notna(df_all['均价(￥/M2)']) & 
-        (df_all['均价(￥/M2)'] > 0)
-    ].sort_values('日期').reset_index(drop=True)  # 按日期升序，便于找前后
-
-    if valid_prices_df.empty:
+    if model.latest_valid_date is None:
         # 完全没有当日均价数据
         st.markdown(f"""
         <div class="metric-container">
@@ -536,47 +564,21 @@ with col4:
         </div>
         """, unsafe_allow_html=True)
     else:
-        # 找到选中日期对应的行（如果有）
-        selected_date = pd.to_datetime(selected_date_str)
-        selected_valid_row = valid_prices_df[valid_prices_df['日期'] == selected_date]
-
-        if not selected_valid_row.empty:
+        if model.price_mask[selected_idx]:
             # 选中日期本身有数据，直接使用
-            current_row = selected_valid_row.iloc[0]
             current_date_str = selected_date_str
-            is_substitute = False
-        else:
-            # 选中日期无数据：以数据集中**最新**的有记录日期为准（即始终以最新数据为基准）
-            current_row = valid_prices_df.iloc[-1]    # 使用数据中最新的有记录日期
-            current_date_str = current_row['日期'].strftime('%Y-%m-%d')
-            is_substitute = True
-
-        current_price = current_row['均价(￥/M2)']
-
-        # 找到它的“前一个有记录的日期”（严格前一个）
-        current_idx = valid_prices_df[valid_prices_df['日期'] == current_row['日期']].index[0]
-        if current_idx > 0:
-            prev_row = valid_prices_df.iloc[current_idx - 1]
-            prev_price = prev_row['均价(￥/M2)']
-            change_pct = (current_price - prev_price) / prev_price * 100
-            change_str = f"{'↑' if change_pct > 0 else '↓'} {abs(change_pct):.1f}%"
-            change_class = "up" if change_pct > 0 else "down"
-        else:
-            change_str = "—"
-            change_class = "none"
-
-        # 标签文字
-        if not is_substitute:
             label_text = f"{selected_date_str} 当日均价"
         else:
+            # 选中日期无数据：以数据集中**最新**的有记录日期为准
+            current_date_str = model.latest_valid_date
             label_text = f"最新均价({current_date_str})"
 
-        current_price_display = f"¥{current_price:,.2f}" if not pd.isna(current_price) else "N/A"
-
+        # 当日均价及环比（已与上一个有记录的日期比较）
+        current = model.price(current_date_str)
         st.markdown(f"""
         <div class="metric-container">
-            <div class="kpi-change {change_class}">{change_str}</div>
-            <div class="metric-value">{current_price_display}</div>
+            <div class="kpi-change {current['change']['class']}">{current['change']['text']}</div>
+            <div class="metric-value">¥{current['price']:,.2f}</div>
             <div class="metric-label">{label_text}</div>
         </div>
         """, unsafe_allow_html=True) 
@@ -589,211 +591,54 @@ st.markdown("<br><br>", unsafe_allow_html=True)
 
 col_detail, col_chart = st.columns([4, 6])
 
-# 左侧：成交明细列表
-with col_detail:
-    # 将成交明细渲染为卡片样式，整体更美观
-    price = selected_row.get('均价(￥/M2)', 0)
-    if price == 0 or pd.isna(price):
-        # 当天无成交：在卡片内显示空状态并在卡片下方（视觉上为卡片内）放置跳转按钮
-        if not valid_prices_df.empty:
-            latest_valid_date_str = valid_prices_df.iloc[-1]['日期'].strftime('%Y-%m-%d')
-            latest_valid_date = valid_prices_df.iloc[-1]['日期'].date()
-            
-            def _goto_latest():
-                # 设置日期选择器的值
-                st.session_state[f"date_input_{project}"] = latest_valid_date
-
-            card_html = textwrap.dedent(f"""
+def render_detail_card(body_html: str):
+    """渲染成交明细卡片（一次性渲染卡片及其内部内容，避免 Streamlit 将子块分离到不同容器中）"""
+    card_html = textwrap.dedent(f"""
 <div class="detail-card">
   <div class="card-header">
     <div class="card-title">{selected_date_str} 成交明细</div>
   </div>
   <div class="card-body">
-    <div class="detail-empty">当天暂无成交记录。</div>
+{body_html}
   </div>
 </div>
 """).strip()
-            st.markdown(card_html, unsafe_allow_html=True)
+    st.markdown(card_html, unsafe_allow_html=True)
 
-            st.button("跳转至最新成交", on_click=_goto_latest)
-        else:
-            # 全部数据都没有的兜底信息，仍然放在卡片内提醒用户
-            card_html = textwrap.dedent(f"""
-<div class="detail-card">
-  <div class="card-header">
-    <div class="card-title">{selected_date_str} 成交明细</div>
-  </div>
-  <div class="card-body">
-    <div class="detail-empty">暂无数据，请先更新或检查 data/total.json</div>
-  </div>
-</div>
-""").strip()
-            st.markdown(card_html, unsafe_allow_html=True)
-    else:
-        house_data = selected_row.get('成交户号', [])
-        if house_data and isinstance(house_data, list) and len(house_data) > 0:
-            # 将所有条目拼接为一个 HTML 块再一次性渲染，确保子元素在卡片内部
-            items_html = ""
-            for house in house_data:
-                b_name = house.get('building_name', '')
-                h_no = house.get('house_no', '')
-                area = house.get('area', 0)
-
-                if b_name and h_no:
-                    display_b_name = b_name.replace('#住宅楼', '').replace('5-', '')
-                    full_house_no = f"{display_b_name}#{h_no}"
-                else:
-                    full_house_no = f"{b_name} {h_no}".strip()
-
-                if not full_house_no:
-                    full_house_no = "未知房号"
-
-                # 转义用户数据，防止注入或标签未闭合导致页面异常显示
-                safe_full_house_no = html.escape(full_house_no)
-                safe_area = html.escape(str(area))
-
-                # 计算总价（建筑面积 * 当日均价），当 area 或 当日均价 无效时显示 N/A
-                try:
-                    area_val = float(area)
-                except Exception:
-                    area_val = None
-
-                if price and not pd.isna(price) and area_val and area_val > 0:
-                    total_price = area_val * price
-                    price_str = f"¥{total_price:,.2f}"
-                else:
-                    price_str = "N/A"
-
-                safe_price_str = html.escape(price_str)
-
-                items_html += f"""
-<div class="house-card">
+def house_card_html(card: dict) -> str:
+    """单条成交记录（转义用户数据，防止注入或标签未闭合导致页面异常显示）"""
+    return f"""<div class="house-card">
   <div class="house-info">
-    <div class="house-no">{safe_full_house_no}</div>
+    <div class="house-no">{html.escape(card['house'])}</div>
     <div class="house-area">
-      <span>建筑面积: <b>{safe_area} ㎡</b></span>
+      <span>建筑面积: <b>{html.escape(card['area'])} ㎡</b></span>
     </div>
   </div>
-  <div class="house-price">{safe_price_str}</div>
-</div>
-"""
+  <div class="house-price">{html.escape(card['price'])}</div>
+</div>"""
 
-            # 去除每行的缩进，避免被 Markdown 识别为代码块
-            items_html = textwrap.dedent(items_html).strip()
-
-            # 一次性渲染卡片及其内部内容，避免 Streamlit 将子块分离到不同容器中
-            card_html = textwrap.dedent(f"""
-<div class="detail-card">
-  <div class="card-header">
-    <div class="card-title">{selected_date_str} 成交明细</div>
-  </div>
-  <div class="card-body">
-{items_html}
-  </div>
-</div>
-""").strip()
-            st.markdown(card_html, unsafe_allow_html=True)
+# 左侧：成交明细列表
+with col_detail:
+    if not model.price_mask[selected_idx]:
+        # 当天无成交：在卡片内显示空状态并在卡片下方（视觉上为卡片内）放置跳转按钮
+        if model.latest_valid_date is not None:
+            latest_valid_date = date.fromisoformat(model.latest_valid_date)
 
-            # 将跳转按钮也渲染（视觉上位于卡片内部右下方）
-            # latest_valid_date_str = valid_prices_df.iloc[-1]['日期'].strftime('%Y-%m-%d') if not valid_prices_df.empty else None
-            # def _goto_latest():
-            #     if latest_valid_date_str:
-            #         st.session_state['selected_date'] = latest_valid_date_str
+            def _goto_latest():
+                # 设置日期选择器的值
+                st.session_state[f"date_input_{project}"] = latest_valid_date
 
-            # st.button("跳转至最新成交", on_click=_goto_latest)
+            render_detail_card('    <div class="detail-empty">当天暂无成交记录。</div>')
+            st.button("跳转至最新成交", on_click=_goto_latest)
         else:
-            # 当天有均价但无具体户号信息：若存在面积或总价，则以与其他成交卡片相同的格式显示一条合成记录，
-            # 仅将户号替换为占位文本（默认：“无户号”），否则显示空状态
-            area_val = selected_row.get('面积(M2)')
-            total_val = selected_row.get('总价(￥)')
-            avg_val = selected_row.get('均价(￥/M2)')
-
-            has_area_or_total = ((area_val is not None and not pd.isna(area_val) and str(area_val) != "") or
-                                 (total_val is not None and not pd.isna(total_val) and str(total_val) != ""))
-
-            if has_area_or_total:
-                # 构造一条合成记录，保持与实际户号项完全一致的渲染逻辑（只是替换户号文本）
-                placeholder = "无户号"
-                fake_house = {
-                    'building_name': '',
-                    'house_no': placeholder,
-                    'area': area_val if area_val is not None and not pd.isna(area_val) and str(area_val) != "" else 0
-                }
-
-                # 按原有单条 house 渲染逻辑构建 HTML
-                b_name = fake_house.get('building_name', '')
-                h_no = fake_house.get('house_no', '')
-                area = fake_house.get('area', 0)
-
-                if b_name and h_no:
-                    display_b_name = b_name.replace('#住宅楼', '').replace('5-', '')
-                    full_house_no = f"{display_b_name}#{h_no}"
-                else:
-                    full_house_no = f"{b_name} {h_no}".strip()
-
-                if not full_house_no:
-                    full_house_no = "未知房号"
-
-                safe_full_house_no = html.escape(full_house_no)
-                safe_area = html.escape(str(area))
-
-                try:
-                    area_val_f = float(area)
-                except Exception:
-                    area_val_f = None
-
-                # 优先使用面积*当日均价计算总价，若不可用则使用 provided total_val
-                if price and not pd.isna(price) and area_val_f and area_val_f > 0:
-                    total_price = area_val_f * price
-                    price_str = f"¥{total_price:,.2f}"
-                else:
-                    try:
-                        if total_val is not None and not pd.isna(total_val) and str(total_val) != "":
-                            price_str = f"¥{float(total_val):,.2f}"
-                        else:
-                            price_str = "N/A"
-                    except Exception:
-                        price_str = "N/A"
-
-                safe_price_str = html.escape(price_str)
-
-                items_html = f"""
-<div class="house-card">
-  <div class="house-info">
-    <div class="house-no">{safe_full_house_no}</div>
-    <div class="house-area">
-      <span>建筑面积: <b>{safe_area} ㎡</b></span>
-    </div>
-  </div>
-  <div class="house-price">{safe_price_str}</div>
-</div>
-"""
-                items_html = textwrap.dedent(items_html).strip()
-
-                card_html = textwrap.dedent(f"""
-<div class="detail-card">
-  <div class="card-header">
-    <div class="card-title">{selected_date_str} 成交明细</div>
-  </div>
-  <div class="card-body">
-{items_html}
-  </div>
-</div>
-""").strip()
-                st.markdown(card_html, unsafe_allow_html=True)
-            else:
-                # 仍然显示空状态
-                card_html = textwrap.dedent(f"""
-<div class="detail-card">
-  <div class="card-header">
-    <div class="card-title">{selected_date_str} 成交明细</div>
-  </div>
-  <div class="card-body">
-    <div class="detail-empty">当天暂无具体的成交户号记录。</div>
-  </div>
-</div>
-""").strip()
-                st.markdown(card_html, unsafe_allow_html=True)
+            # 全部数据都没有的兜底信息，仍然放在卡片内提醒用户
+            render_detail_card('    <div class="detail-empty">暂无数据，请先更新或检查 data/total.json</div>')
+    else:
+        # 成交卡片已在 view.json 中生成：当天有均价但无户号时，若存在面积或总价则为一条“无户号”记录
+        if model.deal_mask[selected_idx]:
+            render_detail_card("\n\n".join(house_card_html(card) for card in model.deals(selected_date_str)))
+        else:
+            render_detail_card('    <div class="detail-empty">当天暂无具体的成交户号记录。</div>')
 
 # 右侧：价格走势图表
 with col_chart:
@@ -825,62 +670,139 @@ with col_chart:
                 fillcolor=f'rgba({r},{g},{b},{alpha})', hoverinfo='skip', showlegend=False, legendgroup=legendgroup
             ))
 
-    # 构建图表（我们先为每条曲线添加渐变填充，再添加对应的线条，保证线条在最上层）
-    fig = go.Figure()
-
-    x = df_all['日期']
-    y_primary = df_all['成交均价(￥/M2)']
-    y_secondary = df_all['均价(￥/M2)']
+    # 小工具：快速模式的渐变面积，每条曲线只用一个填充 trace
+    # fillgradient（plotly >= 5.20）直接对单个 fill 做纵向线性渐变；不支持时退化为单色半透明填充
+    def add_native_gradient_fill(fig, x, y, hex_color, baseline, legendgroup=None, alpha_min=0.005, alpha_max=0.26):
+        r, g, b = hex_to_rgb(hex_color)
+        fig.add_trace(go.Scatter(
+            x=x, y=np.full(len(x), baseline),
+            mode='lines', line=dict(width=0), showlegend=False, hoverinfo='skip', legendgroup=legendgroup
+        ))
+        if HAS_FILLGRADIENT:
+            fill = dict(fillgradient=dict(type='vertical', colorscale=[
+                [0, f'rgba({r},{g},{b},{alpha_min})'], [1, f'rgba({r},{g},{b},{alpha_max})']
+            ]))
+        else:
+            fill = dict(fillcolor=f'rgba({r},{g},{b},{(alpha_min + alpha_max) / 2})')
+        fig.add_trace(go.Scatter(
+            x=x, y=y,
+            mode='lines', line=dict(width=0), fill='tonexty', hoverinfo='skip', showlegend=False,
+            legendgroup=legendgroup, **fill
+        ))
 
-    # 使用全局基线：取两条曲线的最小值并减去 5% 缓冲，保证两条曲线的面积都从相同的“图表底部”开始
-    combined_min = pd.concat([y_primary.dropna(), y_secondary.dropna()]) if (not y_primary.dropna().empty or not y_secondary.dropna().empty) else pd.Series([])
-    if not combined_min.empty:
-        combined_min_val = float(combined_min.min())
-        combined_max_val = float(combined_min.max())
-        r = (combined_max_val - combined_min_val) if (combined_max_val - combined_min_val) != 0 else max(abs(combined_min_val) * 0.02, 1.0)
-        baseline_common = float(combined_min_val - r * 0.05)
-    else:
-        baseline_common = 0.0
+    # 小工具：点数超过 CHART_MAX_POINTS 时去掉缺失值并按 LTTB 降采样（保留峰谷形状）
+    def downsample(x, y):
+        if len(x) <= CHART_MAX_POINTS:
+            return x, y
+        valid = y.notna().to_numpy()
+        x, y = x[valid], y[valid]
+        idx = lttb_indices(np.asarray(x, dtype='datetime64[ns]').astype(np.int64), y.to_numpy(), CHART_MAX_POINTS)
+        return x[idx], y.iloc[idx]
+
+    def build_price_figure(model, mode):
+        """构建走势图（不含选中日期的高亮），返回 figure 字典，按项目与数据版本缓存"""
+        # 我们先为每条曲线添加渐变填充，再添加对应的线条，保证线条在最上层
+        fig = go.Figure()
+
+        x = model.index
+        x_primary, y_primary = x, model.avg_price
+        x_secondary, y_secondary = x, model.daily_price
+
+        # 使用全局基线（view.json 中已计算）：两条曲线的最小值减去 5% 缓冲，保证两条曲线的面积都从相同的“图表底部”开始
+        baseline_common = model.series["baseline"]
+
+        line_trace, line_shape = go.Scatter, 'spline'
+        if mode == "fast":
+            x_primary, y_primary = downsample(x, y_primary)
+            x_secondary, y_secondary = downsample(x, y_secondary)
+            if len(x) > CHART_WEBGL_THRESHOLD:
+                # 长历史使用 WebGL 渲染曲线（Scattergl 不支持 spline）
+                line_trace, line_shape = go.Scattergl, 'linear'
+
+            # 每条曲线一个原生渐变填充 trace
+            if not y_primary.dropna().empty:
+                add_native_gradient_fill(fig, x_primary, y_primary, COLOR_PRIMARY, baseline=baseline_common, legendgroup='累计均价', alpha_min=0.005, alpha_max=0.26)
+            if not y_secondary.dropna().empty:
+                add_native_gradient_fill(fig, x_secondary, y_secondary, COLOR_SECONDARY, baseline=baseline_common, legendgroup='当日均价', alpha_min=0.005, alpha_max=0.22)
+        else:
+            # 为每条曲线添加渐变面积（各自独立地基于相同的 baseline），使用较低的 alpha 以保持数据可读性
+            if not y_primary.dropna().empty:
+                # 使用连续近似渐变：40 层默认，alpha 从 0.005 至 0.26
+                add_gradient_fill_between_baseline(fig, x, y_primary, COLOR_PRIMARY, baseline=baseline_common, legendgroup='累计均价', n_layers=40, alpha_min=0.005, alpha_max=0.26)
+            if not y_secondary.dropna().empty:
+                # 使用连续近似渐变：40 层默认，alpha 从 0.005 至 0.22
+                add_gradient_fill_between_baseline(fig, x, y_secondary, COLOR_SECONDARY, baseline=baseline_common, legendgroup='当日均价', n_layers=40, alpha_min=0.005, alpha_max=0.22)
+
+        # 累计均价线 - 青蓝色（置于渐变之上）
+        fig.add_trace(line_trace(
+            x=x_primary, y=y_primary,
+            mode='lines+markers', name='累计均价', legendgroup='累计均价',
+            line=dict(width=3, color=COLOR_PRIMARY, shape=line_shape),
+            marker=dict(size=6, color='white', line=dict(width=2, color=COLOR_PRIMARY)),
+            hovertemplate="¥%{y:,.2f}<br>日期: %{x|%Y-%m-%d}",
+            customdata=x_primary  # 存储日期数据用于点击事件
+        ))
 
-    # 为每条曲线添加渐变面积（各自独立地基于相同的 baseline），使用较低的 alpha 以保持数据可读性
-    if not y_primary.dropna().empty:
-        # 使用连续近似渐变：40 层默认，alpha 从 0.005 至 0.26
-        add_gradient_fill_between_baseline(fig, x, y_primary, COLOR_PRIMARY, baseline=baseline_common, legendgroup='累计均价', n_layers=40, alpha_min=0.005, alpha_max=0.26)
-    if not y_secondary.dropna().empty:
-        # 使用连续近似渐变：40 层默认，alpha 从 0.005 至 0.22
-        add_gradient_fill_between_baseline(fig, x, y_secondary, COLOR_SECONDARY, baseline=baseline_common, legendgroup='当日均价', n_layers=40, alpha_min=0.005, alpha_max=0.22)
+        # 当日均价线 - 橙黄色（置于渐变之上）
+        fig.add_trace(line_trace(
+            x=x_secondary, y=y_secondary,
+            mode='lines+markers', name='当日均价', legendgroup='当日均价',
+            line=dict(width=3, color=COLOR_SECONDARY, shape=line_shape),
+            marker=dict(size=6, color='white', line=dict(width=2, color=COLOR_SECONDARY)),
+            connectgaps=True,
+            hovertemplate="¥%{y:,.2f}<br>日期: %{x|%Y-%m-%d}",
+            customdata=x_secondary  # 存储日期数据用于点击事件
+        ))
 
-    # 累计均价线 - 青蓝色（置于渐变之上）
-    fig.add_trace(go.Scatter(
-        x=x, y=y_primary,
-        mode='lines+markers', name='累计均价', legendgroup='累计均价',
-        line=dict(width=3, color=COLOR_PRIMARY, shape='spline'),
-        marker=dict(size=6, color='white', line=dict(width=2, color=COLOR_PRIMARY)),
-        hovertemplate="¥%{y:,.2f}<br>日期: %{x|%Y-%m-%d}",
-        customdata=x  # 存储日期数据用于点击事件
-    ))
+        fig.update_layout(
+            height=480,  # 提高图表高度避免被裁切，同时适应卡片
+            margin=dict(l=40, r=20, t=18, b=100),  # 增加底部外边距以保证 x 轴标签完全可见
+            hovermode="x unified",
+            hoverlabel=dict(bgcolor='white', font_size=12, font_family="PingFang SC, Microsoft YaHei, sans-serif"),
+            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)',
+            xaxis=dict(
+                showgrid=False,
+                tickformat="%Y-%m-%d",
+                linecolor='#e2e8f0',
+                showline=True,
+                showticklabels=True,
+                ticks='outside',
+                tickangle=-45,
+                tickfont=dict(color='#475569', size=11),
+                automargin=True
+            ),
+            yaxis=dict(
+                showgrid=True,
+                gridcolor='#f1f5f9',
+                tickformat=",.0f",
+                showline=True,
+                linecolor='#e2e8f0',
+                showticklabels=True,
+                tickfont=dict(color='#475569', size=11),
+                automargin=True
+            )
+        )
+        return fig.to_dict()
 
-    # 当日均价线 - 橙黄色（置于渐变之上）
-    fig.add_trace(go.Scatter(
-        x=x, y=y_secondary,
-        mode='lines+markers', name='当日均价', legendgroup='当日均价',
-        line=dict(width=3, color=COLOR_SECONDARY, shape='spline'),
-        marker=dict(size=6, color='white', line=dict(width=2, color=COLOR_SECONDARY)),
-        connectgaps=True,
-        hovertemplate="¥%{y:,.2f}<br>日期: %{x|%Y-%m-%d}",
-        customdata=x  # 存储日期数据用于点击事件
-    ))
+    # 走势图本体按项目与数据版本缓存，每次交互只在其上叠加选中日期的高亮
+    fig = go.Figure(_cached((project, "figure", CHART_MODE), lambda: build_price_figure(model, CHART_MODE)))
+    x = model.index
+    y_primary = model.avg_price
+    y_secondary = model.daily_price
 
     # 选中日期的高亮圈
+    selected_x = x[selected_idx]
     fig.add_trace(go.Scatter(
-        x=[selected_row['日期']], y=[selected_row['成交均价(￥/M2)']],
+        x=[selected_x], y=[y_primary.iloc[selected_idx]],
         mode='markers', showlegend=False, legendgroup='累计均价',
         marker=dict(size=14, color=COLOR_PRIMARY, opacity=0.3, line=dict(width=2, color=COLOR_PRIMARY)),
         hoverinfo='skip'
     ))
 
     fig.add_trace(go.Scatter(
-        x=[selected_row['日期']], y=[selected_row['均价(￥/M2)']],
+        x=[selected_x], y=[y_secondary.iloc[selected_idx]],
         mode='markers', showlegend=False, legendgroup='当日均价',
         marker=dict(size=14, color=COLOR_SECONDARY, opacity=0.3, line=dict(width=2, color=COLOR_SECONDARY)),
         hoverinfo='skip'
@@ -888,45 +810,14 @@ with col_chart:
 
     # 添加虚线（选中日期的垂直参考线）
     fig.add_trace(go.Scatter(
-        x=[selected_row['日期'], selected_row['日期']], 
-        y=[min(df_all['成交均价(￥/M2)'].min(), df_all['均价(￥/M2)'].min()), max(df_all['成交均价(￥/M2)'].max(), df_all['均价(￥/M2)'].max())], 
+        x=[selected_x, selected_x], 
+        y=model.series["y_range"] or [None, None], 
         mode='lines', 
         showlegend=False, 
         line=dict(color='lightgray', dash='dot', width=1.5),  # 使用点状虚线，颜色更柔和，宽度较细
         hoverinfo='skip'
     ))
 
-    fig.update_layout(
-        height=500,  # 提高图表高度避免被裁切
-        margin=dict(l=40, r=20, t=18, b=100),  # 增加底部外边距以保证 x 轴标签完全可见
-        hovermode="x unified",
-        hoverlabel=dict(bgcolor='white', font_size=12, font_family="PingFang SC, Microsoft YaHei, sans-serif"),
-        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        xaxis=dict(
-            showgrid=False,
-            tickformat="%Y-%m-%d",
-            linecolor='#e2e8f0',
-            showline=True,
-            showticklabels=True,
-            ticks='outside',
-            tickangle=-45,
-            tickfont=dict(color='#475569', size=11),
-            automargin=True
-        ),
-        yaxis=dict(
-            showgrid=True,
-            gridcolor='#f1f5f9',
-            tickformat=",.0f",
-            showline=True,
-            linecolor='#e2e8f0',
-            showticklabels=True,
-            tickfont=dict(color='#475569', size=11),
-            automargin=True
-        )
-    )
-
     # 创建图表卡片容器（使用 st.container + CSS 实现完美卡片效果）
     st.markdown("""
     <style>
@@ -983,9 +874,6 @@ with col_chart:
     """, unsafe_allow_html=True)
 
     # 使用 plotly_chart 并启用点击事件
-    # 调整图表高度以适应卡片
-    fig.update_layout(height=480)
-    
     selected_points = st.plotly_chart(
         fig, 
         use_container_width=True, 
@@ -997,14 +885,16 @@ with col_chart:
     # 处理点击事件
     if selected_points and selected_points.selection and selected_points.selection.points:
         point = selected_points.selection.points[0]
-        clicked_date = point.get('x') or point.get('point_index')
+        # 日期取自 customdata（降采样后 point_index 对应的是缩减后的 trace，不能用来索引 model.index），
+        # 填充与高亮 trace 没有 customdata，退回 x
+        clicked_date = point.get('customdata') or point.get('x')
+        if isinstance(clicked_date, (list, tuple)):
+            clicked_date = clicked_date[0]
         
         from datetime import datetime
         try:
             if isinstance(clicked_date, str):
-                clicked_date = datetime.strptime(clicked_date.split("T")[0], "%Y-%m-%d").date()
-            elif isinstance(clicked_date, int):
-                clicked_date = df_all.iloc[clicked_date]['日期'].date()
+                clicked_date = datetime.strptime(clicked_date.split("T")[0].split(" ")[0], "%Y-%m-%d").date()
             elif hasattr(clicked_date, 'date'):
                 clicked_date = clicked_date.date()
             
@@ -1019,80 +909,64 @@ with col_chart:
 # 6. 全部成交表格卡片（显示所有成交信息）
 # ==========================================
 st.markdown('<br>', unsafe_allow_html=True)
-with st.expander("查看全部成交明细表", expanded=False):
-    # 构造所有成交明细表
-    records = []
-    for idx, row in df_all.iterrows():
-        date_val = row.get('日期')
-        date_str = date_val.strftime('%Y-%m-%d') if not pd.isna(date_val) else ''
-        price = row.get('均价(￥/M2)')  # 优先使用当日均价
-
-        house_list = row.get('成交户号', []) if row.get('成交户号') else []
-        if isinstance(house_list, list) and len(house_list) > 0:
-            for h in house_list:
-                b = h.get('building_name','')
-                no = h.get('house_no','')
-                area = h.get('area', None)
-                try:
-                    area_f = float(area) if area not in (None, '', 'null') else None
-                except Exception:
-                    area_f = None
-
-                if price and not pd.isna(price) and area_f:
-                    total = area_f * price
-                else:
-                    total = row.get('总价(￥)') if row.get('总价(￥)') not in (None, '', 'null') else None
-
-                records.append({
-                    '日期': date_str,
-                    '楼栋': b,
-                    '房号': no,
-                    '建筑面积(㎡)': area_f if area_f is not None else None,
-                    '单价(￥/M2)': price if not pd.isna(price) else None,
-                    '总价(￥)': total
-                })
-        else:
-            # 无具体户号时，如存在面积或总价则合成一条记录
-            area_val = row.get('面积(M2)')
-            total_val = row.get('总价(￥)')
-            if (area_val is not None and not pd.isna(area_val) and str(area_val) != "") or (total_val is not None and not pd.isna(total_val) and str(total_val) != ""):
-                try:
-                    area_f = float(area_val) if area_val not in (None, '', 'null') else None
-                except Exception:
-                    area_f = None
-                if price and not pd.isna(price) and area_f:
-                    total = area_f * price
-                else:
-                    try:
-                        total = float(total_val) if total_val not in (None, '', 'null') else None
-                    except Exception:
-                        total = None
-                records.append({
-                    '日期': date_str,
-                    '楼栋': '',
-                    '房号': '无户号',
-                    '建筑面积(㎡)': area_f,
-                    '单价(￥/M2)': price if not pd.isna(price) else None,
-                    '总价(￥)': total
-                })
-
-    df_tx = pd.DataFrame(records)
-    if df_tx.empty:
-        st.info("当前没有任何可显示的成交条目。")
+
+TX_PAGE_SIZES = [20, 50, 100, 200]
+
+def load_transactions(project: str, sort_by: str = None, ascending: bool = True) -> pd.DataFrame:
+    """全部成交明细（按数据版本与排序方式缓存）
+    sort_by 为 None 时按日期升序（导出顺序）；为 "默认" 时按日期倒序、楼栋与房号升序（忽略 ascending）
+    """
+    if sort_by is None:
+        return _cached((project, "transactions"), lambda: transaction_table(load_all_data(project)))
+
+    if sort_by == "默认":
+        # 方向固定，忽略 ascending
+        key = (project, "transactions", sort_by)
+        sort_by, ascending = ['日期', '楼栋', '房号'], [False, True, True]
     else:
-        # 格式化展示列
-        df_display = df_tx.copy()
-        if '建筑面积(㎡)' in df_display.columns:
-            df_display['建筑面积(㎡)'] = df_display['建筑面积(㎡)'].apply(lambda x: f"{x:.2f}" if pd.notna(x) else '')
-        if '单价(￥/M2)' in df_display.columns:
-            df_display['单价(￥/M2)'] = df_display['单价(￥/M2)'].apply(lambda x: f"¥{x:,.2f}" if pd.notna(x) else '')
-        if '总价(￥)' in df_display.columns:
-            df_display['总价(￥)'] = df_display['总价(￥)'].apply(lambda x: f"¥{x:,.2f}" if pd.notna(x) else '')
-
-        st.dataframe(df_display.sort_values(['日期','楼栋','房号'], ascending=[False, True, True]), use_container_width=True)
-
-        # 导出 CSV
-        csv = df_tx.to_csv(index=False, encoding='utf-8-sig')
+        key = (project, "transactions", sort_by, ascending)
+    return _cached(key, lambda: load_transactions(project).sort_values(sort_by, ascending=ascending, kind='stable'))
+
+def format_transactions(df: pd.DataFrame) -> pd.DataFrame:
+    """格式化展示列（只作用于当前页）"""
+    df = df.copy()
+    df['建筑面积(㎡)'] = df['建筑面积(㎡)'].map('{:.2f}'.format).where(df['建筑面积(㎡)'].notna(), '')
+    for col in ('单价(￥/M2)', '总价(￥)'):
+        df[col] = df[col].map('¥{:,.2f}'.format).where(df[col].notna(), '')
+    return df
+
+# 只在展开时构造表格（旧版 Streamlit 不支持按展开状态执行时始终构造）
+try:
+    tx_expander = st.expander("查看全部成交明细表", expanded=False, key=f"tx_expander_{project}", on_change="rerun")
+    tx_open = tx_expander.open
+except TypeError:
+    tx_expander = st.expander("查看全部成交明细表", expanded=False)
+    tx_open = True
+
+with tx_expander:
+    df_tx = load_transactions(project) if tx_open else None
+    if df_tx is not None and df_tx.empty:
+        st.info("当前没有任何可显示的成交条目。")
+    elif df_tx is not None:
+        # 服务端排序与分页：每次只格式化并发送当前页
+        c_sort, c_order, c_size, c_page = st.columns([3, 2, 2, 2])
+        sort_by = c_sort.selectbox("排序列", ["默认"] + TRANSACTION_COLUMNS, key=f"tx_sort_{project}")
+        # “默认”排序的方向固定（日期倒序、楼栋与房号升序），此时顺序选项不可用
+        ascending = c_order.radio("顺序", ["升序", "降序"], horizontal=True, key=f"tx_order_{project}",
+                                  disabled=sort_by == "默认") == "升序"
+        page_size = c_size.selectbox("每页条数", TX_PAGE_SIZES, index=1, key=f"tx_page_size_{project}")
+        n_pages = max(1, -(-len(df_tx) // page_size))
+        # 页码控件的 key 包含每页条数：修改每页条数后回到第 1 页，页码不会超出范围
+        page = int(c_page.number_input("页码", min_value=1, max_value=n_pages, value=1, step=1,
+                                       key=f"tx_page_{project}_{page_size}"))
+
+        df_sorted = load_transactions(project, sort_by, ascending)
+        start = (page - 1) * page_size
+        st.dataframe(format_transactions(df_sorted.iloc[start:start + page_size]), use_container_width=True, hide_index=True)
+        st.caption(f"共 {len(df_tx)} 条，第 {page} / {n_pages} 页")
+
+        # 导出 CSV（全部记录，按日期升序）
+        csv = _cached((project, "transactions_csv"), lambda: df_tx.to_csv(index=False, encoding='utf-8-sig'))
         st.download_button("⬇️ 导出成交表 (CSV)", csv, file_name=f"{project}_all_transactions.csv", mime='text/csv')
 
 
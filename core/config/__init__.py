@@ -57,14 +57,68 @@ COLOR_STATUS_MAP = {
 
 ALL_STATUS = list(COLOR_STATUS_MAP.values())
 
+# 无法识别颜色时的状态
+OTHER_STATUS = "其他"
+
+# 状态编码：ALL_STATUS 按顺序编码为 0..n-1，OTHER_STATUS 为 n（用于紧凑存储与向量化计算）
+STATUS_NAMES = ALL_STATUS + [OTHER_STATUS]
+STATUS_CODES = {status: code for code, status in enumerate(STATUS_NAMES)}
+OTHER_CODE = STATUS_CODES[OTHER_STATUS]
+
 # 并发配置
 MAX_WORKERS = 5
 
+# 状态抓取引擎：'threads'（线程池）或 'async'（asyncio + httpx）
+SCRAPE_ENGINE = os.environ.get("SCRAPE_ENGINE", "threads")
+
+# async 引擎同时在途的请求上限
+ASYNC_MAX_CONCURRENCY = 16
+
+# 数据更新时是否与统计页请求并行预先抓取楼栋状态（无新增签约时会取消）
+# 默认关闭：开启后每次运行（包括没有成交的日子）都会请求全部楼栋页面，换取有成交时更短的耗时
+SPECULATIVE_STATUS_SCRAPE = False
+
+# 流式保存状态快照：每完成一个楼栋即写入快照并与前一天比较（否则全部抓取完成后整体保存再比较）
+STREAM_STATUS_SNAPSHOT = True
+
+# 抓取/解析流水线：抓取线程数、解析进程数（<=0 表示在当前进程内解析）、HTML 队列容量
+FETCH_WORKERS = MAX_WORKERS
+PARSE_WORKERS = min(4, os.cpu_count() or 1)
+PIPELINE_QUEUE_SIZE = 32
+
+# HTML 解析后端：'lxml'（快速）或 'bs4'（参考实现）
+HTML_PARSER = os.environ.get("HTML_PARSER", "lxml")
+
+# 状态快照格式：'cas'（按楼栋内容去重的 blob + 每日 manifest）或 'json'（每天一个完整文件）
+SNAPSHOT_FORMAT = os.environ.get("SNAPSHOT_FORMAT", "cas")
+
+# 快照压缩：'none'、'gzip' 或 'zstd'（需安装 zstandard，未安装时退回 gzip）
+# 作用于 json 格式的整份快照与 cas 格式的 blob（manifest 始终为明文）
+SNAPSHOT_COMPRESSION = os.environ.get("SNAPSHOT_COMPRESSION", "none")
+
+# 汇总数据存储后端：'json'（total.json，默认）或 'sqlite'（total.db，按天 upsert）
+TOTAL_BACKEND = os.environ.get("TOTAL_BACKEND", "json")
+
+# 看板价格走势图：'fast'（每条曲线一个原生渐变填充 trace，长历史使用 WebGL 并降采样）或 'gradient'（40 层叠加近似渐变）
+CHART_MODE = os.environ.get("CHART_MODE", "fast")
+# fast 模式：数据点超过 CHART_WEBGL_THRESHOLD 时曲线使用 Scattergl，超过 CHART_MAX_POINTS 时用 LTTB 降采样
+CHART_WEBGL_THRESHOLD = 1000
+CHART_MAX_POINTS = 1500
+
+# 面积增量抓取：每得到多少条新面积写一次断点文件
+AREAS_CHECKPOINT_EVERY = 50
+
 # 请求超时配置
 REQUEST_TIMEOUT = 30
 
-# 延迟配置（秒）
-REQUEST_DELAY = 0.3
+# 全局限速（整个进程共用）：每秒请求数与允许的突发数
+RATE_LIMIT_RPS = 5.0
+RATE_LIMIT_BURST = 10
+
+# AIMD 自适应并发：超时 / 5xx 时减半，成功时缓慢增长
+ADAPTIVE_MIN_CONCURRENCY = 1
+ADAPTIVE_MAX_CONCURRENCY = ASYNC_MAX_CONCURRENCY
+ADAPTIVE_INITIAL_CONCURRENCY = MAX_WORKERS
 
 
 def get_project_config(project: str = None) -> Dict:
@@ -77,6 +131,10 @@ def get_project_config(project: str = None) -> Dict:
     data_dir = os.path.join("data", project)
     base["DATA_DIR"] = data_dir
     base["AREAS_FILE"] = os.path.join(data_dir, "areas", "areas.json")
+    base["AREAS_CHECKPOINT_FILE"] = os.path.join(data_dir, "areas", "areas.checkpoint.json")
     base["TOTAL_FILE"] = os.path.join(data_dir, "total.json")
+    base["TOTAL_DB"] = os.path.join(data_dir, "total.db")
+    base["VIEW_FILE"] = os.path.join(data_dir, "view.json")
     base["SALES_DIR"] = os.path.join(data_dir, "sales")
+    base["HISTORY_DIR"] = os.path.join(data_dir, "sales", "history")
     return base
\ No newline at end of file
@@ -3,33 +3,123 @@
 统一的数据更新入口
 """
 import logging
-from .processors.data_processor import update_sales_data
+from .processors.data_processor import update_sales_data, update_all_sales_data
 from .utils.time_utils import set_process_tz
+from .config import PROJECTS
 
 logger = logging.getLogger(__name__)
 
-def update_data(project: str = None):
-    """更新销售数据（可指定项目：house|warehouse）"""
+def _resolve_projects(project: str = None) -> list:
+    """命令行中的项目参数 -> 项目列表（all 表示全部项目，未指定时为 house）"""
+    return list(PROJECTS.keys()) if project == "all" else [project or 'house']
+
+def update_data(project: str = None, engine: str = None):
+    """更新销售数据（可指定项目：house|warehouse|parking|all）"""
     logger.info(f"🚀 开始更新销售数据... project={project}")
-    success = update_sales_data(project or 'house')
+    if project == "all":
+        results = update_all_sales_data(engine=engine)
+        for name, success in results.items():
+            if success:
+                logger.info(f"✅ {name} 数据更新完成")
+            else:
+                logger.error(f"❌ {name} 数据更新失败")
+        return
+
+    success = update_sales_data(project or 'house', engine=engine)
     if success:
         logger.info("✅ 数据更新完成")
     else:
         logger.error("❌ 数据更新失败")
 
 
-def update_areas(project: str = None):
-    """更新面积数据（可指定项目）"""
-    logger.info(f"🚀 开始更新面积数据... project={project}")
+def update_areas(project: str = None, incremental: bool = True):
+    """更新面积数据（可指定项目）
+    incremental: 为 True 时只抓取新增房源，为 False 时全部重新抓取
+    """
+    logger.info(f"🚀 开始更新面积数据... project={project} incremental={incremental}")
     try:
         from .scrapers.area_scraper import scrape_areas_data
-        # area scraper may read/write files under data/{project}/areas — ensure it can accept a project if necessary
-        scrape_areas_data(project=project) if 'project' in scrape_areas_data.__code__.co_varnames else scrape_areas_data()
+        scrape_areas_data(project=project or 'house', incremental=incremental)
         logger.info("✅ 面积数据更新完成")
     except Exception as e:
         logger.error(f"❌ 面积数据更新失败: {e}")
 
 
+def migrate_history(project: str = None):
+    """把每日快照目录转换为列式状态历史"""
+    from .storage.history import migrate_history as _migrate
+    for name in _resolve_projects(project):
+        logger.info(f"🚀 开始转换状态历史... project={name}")
+        try:
+            _migrate(name)
+        except Exception as e:
+            logger.error(f"❌ {name} 状态历史转换失败: {e}")
+
+
+def convert_snapshots(project: str = None, fmt: str = None, compression: str = None):
+    """把历史快照转换为指定格式（cas|json）与压缩方式（none|gzip|zstd）"""
+    from .storage.snapshots import convert_snapshots as _convert
+    fmt = fmt or "cas"
+    for name in _resolve_projects(project):
+        logger.info(f"🚀 开始转换快照格式... project={name} format={fmt} compression={compression}")
+        try:
+            _convert(name, fmt=fmt, compression=compression)
+        except Exception as e:
+            logger.error(f"❌ {name} 快照转换失败: {e}")
+
+
+def rebuild_total(project: str = None, start: str = None, end: str = None):
+    """由快照历史重建 total.json（可指定日期范围）"""
+    from .processors.rebuild import rebuild_total as _rebuild
+    for name in _resolve_projects(project):
+        logger.info(f"🚀 开始重建汇总数据... project={name} from={start} to={end}")
+        try:
+            _rebuild(name, start=start, end=end)
+        except Exception as e:
+            logger.error(f"❌ {name} 汇总数据重建失败: {e}")
+
+
+def export_total(project: str = None):
+    """把 sqlite 后端的汇总数据导出为 total.json"""
+    from .storage.total_store import export_json
+    for name in _resolve_projects(project):
+        try:
+            export_json(name)
+        except Exception as e:
+            logger.error(f"❌ {name} 汇总数据导出失败: {e}")
+
+
+def build_view(project: str = None):
+    """由汇总数据重新生成看板视图 view.json"""
+    from .processors.view_model import save_view
+    for name in _resolve_projects(project):
+        try:
+            save_view(name)
+        except Exception as e:
+            logger.error(f"❌ {name} 看板视图生成失败: {e}")
+
+
+def pop_option(argv: list, name: str, default: str = None) -> str:
+    """从参数列表中取出 `--name value` 或 `--name=value` 形式的选项（会修改 argv）"""
+    for i, arg in enumerate(argv):
+        if arg == name and i + 1 < len(argv):
+            value = argv[i + 1]
+            del argv[i:i + 2]
+            return value
+        if arg.startswith(name + "="):
+            del argv[i]
+            return arg.split("=", 1)[1]
+    return default
+
+
+def pop_flag(argv: list, name: str) -> bool:
+    """从参数列表中取出布尔开关 `--name`（会修改 argv）"""
+    if name in argv:
+        argv.remove(name)
+        return True
+    return False
+
+
 def main():
     """主函数"""
     # 设定进程默认时区（UTC/其他服务器默认时区可能不同）
@@ -53,18 +143,49 @@ def main():
     
     import sys
 
-    if len(sys.argv) > 1:
-        command = sys.argv[1]
-        project = sys.argv[2] if len(sys.argv) > 2 else None
+    argv = sys.argv[1:]
+    engine = pop_option(argv, "--engine")
+    full_refresh = pop_flag(argv, "--full-refresh")
+    snapshot_format = pop_option(argv, "--format")
+    compression = pop_option(argv, "--compression")
+    date_from = pop_option(argv, "--from")
+    date_to = pop_option(argv, "--to")
+    if engine not in (None, "async", "threads"):
+        logger.error(f"未知的抓取引擎: {engine}（可选 async|threads）")
+        return
+
+    if len(argv) > 0:
+        command = argv[0]
+        project = argv[1] if len(argv) > 1 else None
         if command == "areas":
-            update_areas(project)
+            update_areas(project, incremental=not full_refresh)
         elif command == "data":
-            update_data(project)
+            update_data(project, engine=engine)
+        elif command == "history" and project == "migrate":
+            migrate_history(argv[2] if len(argv) > 2 else None)
+        elif command == "snapshots" and project == "convert":
+            convert_snapshots(argv[2] if len(argv) > 2 else None, fmt=snapshot_format,
+                              compression=compression)
+        elif command == "total" and project == "export":
+            export_total(argv[2] if len(argv) > 2 else None)
+        elif command == "view":
+            build_view(project)
+        elif command == "rebuild":
+            rebuild_total(project, start=date_from, end=date_to)
+        elif command == "full":
+            # 同一进程内先更新面积再更新数据，楼盘表页面只抓取一次
+            update_areas(project, incremental=not full_refresh)
+            update_data(project, engine=engine)
         else:
-            logger.info("用法: PYTHONPATH=/path/to/core python3 core/main.py [areas|data] [project]")
+            logger.info("用法: PYTHONPATH=/path/to/core python3 core/main.py [areas|data|full] [project] [--engine async|threads] [--full-refresh]")
+            logger.info("      PYTHONPATH=/path/to/core python3 core/main.py history migrate [project|all]")
+            logger.info("      PYTHONPATH=/path/to/core python3 core/main.py snapshots convert [project|all] [--format cas|json] [--compression none|gzip|zstd]")
+            logger.info("      PYTHONPATH=/path/to/core python3 core/main.py total export [project|all]")
+            logger.info("      PYTHONPATH=/path/to/core python3 core/main.py rebuild [project|all] [--from DATE --to DATE]")
+            logger.info("      PYTHONPATH=/path/to/core python3 core/main.py view [project|all]")
     else:
         # 默认更新数据（默认项目）
-        update_data()
+        update_data(engine=engine)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
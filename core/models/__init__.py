@@ -1,24 +1,34 @@
 """
 数据模型定义
+模型均使用 __slots__（dataclass(slots=True)），减少大量对象常驻内存时的开销；
+需要长期保留大量楼栋状态时可使用数组存储的 CompactBuildingData（见 compact）
 """
-from typing import Dict, List, Any
-from dataclasses import dataclass
+from typing import Dict, List, Optional
+from dataclasses import dataclass, field
 
-@dataclass
+@dataclass(slots=True)
 class HouseData:
     """房屋数据模型"""
     house_no: str
-    area: float = 0.0
+    area: Optional[float] = 0.0
     status: str = ""
+    house_id: str = ""
 
-@dataclass
+@dataclass(slots=True)
 class BuildingData:
     """楼栋数据模型"""
     building_name: str
     house_data: List[HouseData]
-    status_count: Dict[str, int] = None
+    status_count: Optional[Dict[str, int]] = None
 
-@dataclass
+@dataclass(slots=True)
+class BuildingPage:
+    """楼盘表页面解析结果（一次抓取同时得到状态与房源链接）"""
+    building_name: str
+    status: Optional[BuildingData] = None
+    house_links: List[Dict[str, str]] = field(default_factory=list)
+
+@dataclass(slots=True)
 class StatusChange:
     """状态变化模型"""
     building_name: str
@@ -26,9 +36,12 @@ class StatusChange:
     prev_status: str
     curr_status: str
 
-@dataclass
+@dataclass(slots=True)
 class SalesStats:
     """销售统计模型"""
     signed_units: int
     signed_area: float
-    avg_price: float
\ No newline at end of file
+    avg_price: float
+
+
+from .compact import CompactBuildingData  # noqa: E402
@@ -0,0 +1,114 @@
+"""
+紧凑的楼栋状态模型
+长时间保留大量快照（例如几个月的数据用于分析）时，逐户 HouseData 对象的开销占主导。
+CompactBuildingData 只保存：
+- house_nos：驻留（sys.intern）后的房号元组，不同日期的同一房号（以及相同的房号列表）共用同一对象
+- codes：uint8 状态编码数组（编码规则见 config.STATUS_CODES，无法识别的状态记为 OTHER_STATUS）
+status_count 通过 numpy.bincount 按需计算；house_data 按需生成 HouseData，
+因此原有按 BuildingData 遍历 house_data 的代码无需修改
+"""
+import sys
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union, overload
+
+import numpy as np
+
+from ..config import STATUS_CODES, STATUS_NAMES, OTHER_CODE
+from . import HouseData, BuildingData
+
+
+# 房号元组驻留表：户型布局不变的楼栋在不同日期共用同一个元组
+_house_nos_pool: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+
+def intern_house_nos(house_nos: Sequence[str]) -> Tuple[str, ...]:
+    key = tuple(sys.intern(h) for h in house_nos)
+    return _house_nos_pool.setdefault(key, key)
+
+
+class _HouseView(Sequence):
+    """按需生成 HouseData 的只读序列"""
+    __slots__ = ("_owner",)
+
+    def __init__(self, owner: "CompactBuildingData"):
+        self._owner = owner
+
+    def __len__(self) -> int:
+        return len(self._owner.house_nos)
+
+    @overload
+    def __getitem__(self, index: int) -> HouseData: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[HouseData]: ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        owner = self._owner
+        return HouseData(house_no=owner.house_nos[index], status=STATUS_NAMES[owner.codes[index]])
+
+    def __iter__(self) -> Iterator[HouseData]:
+        names = STATUS_NAMES
+        for house_no, code in zip(self._owner.house_nos, self._owner.codes.tolist()):
+            yield HouseData(house_no=house_no, status=names[code])
+
+
+class CompactBuildingData:
+    """数组存储的楼栋状态（接口与 BuildingData 兼容）"""
+    __slots__ = ("building_name", "house_nos", "codes")
+
+    def __init__(self, building_name: str, house_nos: Tuple[str, ...], codes: np.ndarray):
+        self.building_name = sys.intern(building_name)
+        self.house_nos = house_nos
+        self.codes = codes
+
+    @classmethod
+    def from_houses(cls, building_name: str, houses: Sequence[Union[HouseData, Dict]]) -> "CompactBuildingData":
+        """由 HouseData 列表或快照中的 {"house_no", "status"} 列表创建"""
+        house_nos, codes = [], []
+        for h in houses:
+            house_no, status = (h["house_no"], h["status"]) if isinstance(h, dict) else (h.house_no, h.status)
+            house_nos.append(house_no)
+            codes.append(STATUS_CODES.get(status, OTHER_CODE))
+        codes = np.array(codes, dtype=np.uint8)
+        codes.flags.writeable = False  # 可能被多个快照共用
+        return cls(building_name, intern_house_nos(house_nos), codes)
+
+    @classmethod
+    def from_building(cls, bdata: Union[BuildingData, Dict]) -> "CompactBuildingData":
+        """由 BuildingData 或快照中的楼栋字典创建"""
+        if isinstance(bdata, dict):
+            return cls.from_houses(bdata["building_name"], bdata.get("house_data", []))
+        return cls.from_houses(bdata.building_name, bdata.house_data)
+
+    @property
+    def house_data(self) -> _HouseView:
+        return _HouseView(self)
+
+    @property
+    def status_count(self) -> Dict[str, int]:
+        counts = np.bincount(self.codes, minlength=len(STATUS_NAMES))
+        return {STATUS_NAMES[code]: int(counts[code]) for code in np.flatnonzero(counts)}
+
+    def status_of(self, house_no: str) -> Optional[str]:
+        """某户的状态；不存在时返回 None"""
+        try:
+            return STATUS_NAMES[self.codes[self.house_nos.index(house_no)]]
+        except ValueError:
+            return None
+
+    def to_building_data(self) -> BuildingData:
+        return BuildingData(building_name=self.building_name, house_data=list(self.house_data),
+                            status_count=self.status_count)
+
+    def __len__(self) -> int:
+        return len(self.house_nos)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, CompactBuildingData):
+            return NotImplemented
+        return (self.building_name == other.building_name and self.house_nos == other.house_nos
+                and np.array_equal(self.codes, other.codes))
+
+    def __repr__(self) -> str:
+        return f"CompactBuildingData(building_name={self.building_name!r}, houses={len(self)})"
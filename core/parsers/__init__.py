@@ -0,0 +1,31 @@
+"""
+HTML 解析后端
+- bs4：BeautifulSoup + html.parser，参考实现
+- lxml：基于 lxml 的快速实现，楼盘表只解析目标表格所在片段
+通过 config.HTML_PARSER 选择；lxml 不可用时自动回退到 bs4
+"""
+import logging
+from types import ModuleType
+
+from ..config import HTML_PARSER
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("lxml", "bs4")
+
+
+def get_parser(name: str = None) -> ModuleType:
+    """返回解析后端模块（提供 building_cells / anchors / two_cell_rows / presale_stats_rows）"""
+    name = name or HTML_PARSER
+    if name not in BACKENDS:
+        raise ValueError(f"未知的解析后端: {name}")
+
+    if name == "lxml":
+        try:
+            from . import lxml_backend
+            return lxml_backend
+        except ImportError:
+            logger.warning("未安装 lxml，回退到 bs4 解析后端")
+
+    from . import bs4_backend
+    return bs4_backend
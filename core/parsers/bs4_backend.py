@@ -0,0 +1,66 @@
+"""
+BeautifulSoup 解析后端（参考实现）
+解析结果作为其他后端的基准
+"""
+from typing import List, Optional, Tuple
+from bs4 import BeautifulSoup
+
+
+def building_cells(html: str) -> Optional[List[Tuple[str, str]]]:
+    """提取楼盘表中带 style 和链接的格子，返回 [(房号, style)]；未找到 table_Buileing 时返回 None"""
+    soup = BeautifulSoup(html, "html.parser")
+    table = soup.find("table", id="table_Buileing")
+    if not table:
+        return None
+
+    cells = []
+    for div in table.find_all("div"):
+        style = div.get("style")
+        if not style:
+            continue
+
+        a = div.find("a")
+        if not a:
+            continue
+
+        cells.append((a.get_text(strip=True), style))
+    return cells
+
+
+def anchors(html: str) -> List[Tuple[str, str]]:
+    """提取页面中所有带 href 的链接，返回 [(href, 文本)]"""
+    soup = BeautifulSoup(html, "html.parser")
+    return [(a["href"], a.get_text(strip=True)) for a in soup.find_all("a", href=True)]
+
+
+def two_cell_rows(html: str) -> List[Tuple[str, str]]:
+    """提取恰好包含两个单元格的表格行，返回 [(左侧文本, 右侧文本)]"""
+    soup = BeautifulSoup(html, "html.parser")
+    rows = []
+    for tr in soup.find_all("tr"):
+        tds = tr.find_all("td")
+        if len(tds) == 2:
+            rows.append((tds[0].get_text(strip=True), tds[1].get_text(strip=True)))
+    return rows
+
+
+def presale_stats_rows(html: str) -> Optional[List[List[str]]]:
+    """提取“期房签约统计”数据表的所有行（每行为单元格文本列表）"""
+    soup = BeautifulSoup(html, "html.parser")
+
+    title_td = soup.find(
+        lambda tag: tag.name == "td" and "期房签约统计" in tag.get_text()
+    )
+    if not title_td:
+        return None
+
+    outer_table = title_td.find_parent("table")
+    if not outer_table:
+        return None
+
+    data_table = outer_table.find("table")
+    if not data_table:
+        return None
+
+    return [[td.get_text(strip=True) for td in tr.find_all("td")]
+            for tr in data_table.find_all("tr")]
@@ -0,0 +1,79 @@
+"""
+lxml 解析后端（快速路径）
+- 使用 lxml 的 C 解析器代替 html.parser
+- 楼盘表页面只解析 table_Buileing 起始位置之后的片段，跳过页头导航等无关内容
+返回结构与 bs4_backend 完全一致
+"""
+from typing import List, Optional, Tuple
+import lxml.html
+
+_PARSER = lxml.html.HTMLParser(encoding="utf-8")
+
+
+def _parse(html: str):
+    # 以字节解析，避免 lxml 拒绝带编码声明的 str
+    return lxml.html.document_fromstring(html.encode("utf-8"), parser=_PARSER)
+
+
+def _text(el) -> str:
+    """等价于 bs4 的 get_text(strip=True)"""
+    return "".join(s.strip() for s in el.itertext())
+
+
+def building_cells(html: str) -> Optional[List[Tuple[str, str]]]:
+    """提取楼盘表中带 style 和链接的格子，返回 [(房号, style)]；未找到 table_Buileing 时返回 None"""
+    idx = html.find("table_Buileing")
+    if idx < 0:
+        return None
+    start = max(html.rfind("<table", 0, idx), html.rfind("<TABLE", 0, idx), 0)
+
+    tables = _parse(html[start:]).xpath('//table[@id="table_Buileing"]')
+    if not tables:
+        return None
+
+    cells = []
+    for div in tables[0].iter("div"):
+        style = div.get("style")
+        if not style:
+            continue
+
+        a = div.find(".//a")
+        if a is None:
+            continue
+
+        cells.append((_text(a), style))
+    return cells
+
+
+def anchors(html: str) -> List[Tuple[str, str]]:
+    """提取页面中所有带 href 的链接，返回 [(href, 文本)]"""
+    return [(a.get("href"), _text(a)) for a in _parse(html).xpath("//a[@href]")]
+
+
+def two_cell_rows(html: str) -> List[Tuple[str, str]]:
+    """提取恰好包含两个单元格的表格行，返回 [(左侧文本, 右侧文本)]"""
+    rows = []
+    for tr in _parse(html).iter("tr"):
+        tds = tr.findall(".//td")
+        if len(tds) == 2:
+            rows.append((_text(tds[0]), _text(tds[1])))
+    return rows
+
+
+def presale_stats_rows(html: str) -> Optional[List[List[str]]]:
+    """提取“期房签约统计”数据表的所有行（每行为单元格文本列表）"""
+    root = _parse(html)
+
+    title_tds = [td for td in root.iter("td") if "期房签约统计" in "".join(td.itertext())]
+    if not title_tds:
+        return None
+
+    outer_table = next((p for p in title_tds[0].iterancestors("table")), None)
+    if outer_table is None:
+        return None
+
+    data_table = outer_table.find(".//table")
+    if data_table is None:
+        return None
+
+    return [[_text(td) for td in tr.findall(".//td")] for tr in data_table.iter("tr")]
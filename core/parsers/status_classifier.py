@@ -0,0 +1,55 @@
+"""
+颜色 -> 状态分类器
+由 COLOR_STATUS_MAP 预编译：一个正则提取 background 中的十六进制颜色，再查表得到状态编码
+- 无 background 声明：None（该格子不是房号）
+- 颜色未知或无颜色值：OTHER_CODE
+- 大小写、#RGB 简写均可识别
+"""
+import re
+from typing import Dict, Iterable, List, Optional
+
+from ..config import COLOR_STATUS_MAP, STATUS_CODES, STATUS_NAMES, OTHER_CODE
+
+_BACKGROUND_RE = re.compile(
+    r"background(?:[^;#]*#([0-9a-f]{6}|[0-9a-f]{3})(?![0-9a-f]))?", re.I
+)
+
+
+def _normalize_hex(value: str) -> str:
+    """统一为大写 6 位 #RRGGBB"""
+    value = value.upper()
+    if len(value) == 3:
+        value = "".join(c * 2 for c in value)
+    return "#" + value
+
+
+class StatusClassifier:
+    """根据 style 字符串判定房屋状态编码"""
+
+    def __init__(self, color_status_map: Dict[str, str]):
+        self._code_by_hex = {
+            _normalize_hex(color.lstrip("#")): STATUS_CODES[status]
+            for color, status in color_status_map.items()
+        }
+
+    def classify(self, style: str) -> Optional[int]:
+        """返回状态编码；无 background 声明时返回 None"""
+        found = False
+        for m in _BACKGROUND_RE.finditer(style):
+            found = True
+            if m.group(1):
+                return self._code_by_hex.get(_normalize_hex(m.group(1)), OTHER_CODE)
+        return OTHER_CODE if found else None
+
+    def classify_many(self, styles: Iterable[str]) -> List[Optional[int]]:
+        """批量分类（一个楼栋的所有格子一次完成）"""
+        classify = self.classify
+        return [classify(style) for style in styles]
+
+    @staticmethod
+    def status_name(code: int) -> str:
+        """状态编码 -> 状态名称"""
+        return STATUS_NAMES[code]
+
+
+STATUS_CLASSIFIER = StatusClassifier(COLOR_STATUS_MAP)
@@ -3,104 +3,73 @@
 负责数据更新、计算和整合逻辑
 """
 import os
-import json
-import requests
 import logging
-from datetime import datetime
+import threading
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 from ..utils.time_utils import now_in_zone
 from typing import Dict, List, Optional, Tuple
-from bs4 import BeautifulSoup
 
-from ..config import get_project_config, HEADERS
-from ..utils import fetch_html
-from ..scrapers.status_scraper import get_status_changes
-from ..models import SalesStats, StatusChange
+from ..config import (
+    get_project_config, PROJECTS, SPECULATIVE_STATUS_SCRAPE, STREAM_STATUS_SNAPSHOT, TOTAL_BACKEND
+)
+from ..utils.http import fetch_text, shared_fetch_cache
+from ..scrapers.status_scraper import (
+    get_status_changes, scrape_status_data, stream_status_changes, collect_status_changes
+)
+from ..models import SalesStats, StatusChange, BuildingData
+from ..parsers import get_parser
+from ..utils.serialization import load_file
+from ..storage.total_store import load_base_record, save_record
+from .view_model import save_view
 
 logger = logging.getLogger(__name__)
 
-def read_json_as_dict(json_file: str) -> Dict[str, Dict]:
-    """以日期为 key 读取 JSON 文件（按日期索引）"""
-    if not os.path.exists(json_file):
+# 各项目在“期房签约统计”表中对应的用途
+PROJECT_USAGE = {
+    "warehouse": "戊类库房",
+    "parking": "车位",
+    "house": "住宅",
+}
+
+@lru_cache(maxsize=8)
+def parse_presale_contract_stats_all(html: str) -> Dict[str, SalesStats]:
+    """一次解析“期房签约统计”表中的所有用途行，返回 {用途: SalesStats}
+    结果按页面内容缓存，多个项目共用同一页面时只解析一次
+    """
+    rows = get_parser().presale_stats_rows(html)
+    if not rows or len(rows) < 2:
         return {}
 
-    with open(json_file, "r", encoding="utf-8") as f:
-        data = json.load(f)
-        return {item["日期"]: item for item in data}
+    headers = rows[0]
+    stats_by_usage = {}
 
+    for values in rows[1:]:
+        if len(values) != len(headers):
+            continue
 
-def write_json(data_by_date: Dict[str, Dict], json_file: str):
-    """写入 JSON 文件（按日期排序）"""
-    data_list = [data_by_date[d] for d in sorted(data_by_date.keys())]
-    os.makedirs(os.path.dirname(json_file), exist_ok=True)
-    with open(json_file, "w", encoding="utf-8") as f:
-        json.dump(data_list, f, ensure_ascii=False, indent=4)
-
-
-def find_base_record(data_by_date: Dict[str, Dict], today: str) -> Optional[Dict]:
-    """找到用于对比的上一条记录"""
-    dates = sorted(data_by_date.keys())
-    if not dates:
-        return None
-
-    if dates[-1] != today:
-        return data_by_date[dates[-1]]
+        data = dict(zip(headers, values))
+        usage = data.get("用 途")
+        if not usage or usage in stats_by_usage:
+            continue
 
-    if len(dates) >= 2:
-        return data_by_date[dates[-2]]
+        try:
+            stats_by_usage[usage] = SalesStats(
+                signed_units=int(data["已签约套数"]),
+                signed_area=float(data["已签约面积(M2)"]),
+                avg_price=float(data["成交均价(￥/M2)"]),
+            )
+        except (KeyError, ValueError) as e:
+            logger.warning(f"跳过无法解析的统计行 {usage}: {e}")
 
-    return None
+    return stats_by_usage
 
 def parse_presale_contract_stats(html: str, project: str) -> Optional[SalesStats]:
-    soup = BeautifulSoup(html, "html.parser")
-
-    title_td = soup.find(
-        lambda tag: tag.name == "td" and "期房签约统计" in tag.get_text()
-    )
-    if not title_td:
-        return None
-
-    outer_table = title_td.find_parent("table")
-    if not outer_table:
-        return None
-
-    data_table = outer_table.find("table")
-    if not data_table:
-        return None
-
-    rows = data_table.find_all("tr")
-    if len(rows) < 2:
-        return None
-
-    headers = [td.get_text(strip=True) for td in rows[0].find_all("td")]
-
-    project_map = {
-        "warehouse": "戊类库房",
-        "parking": "车位",
-        "house": "住宅",
-    }
-
-    target_usage = project_map.get(project)
+    target_usage = PROJECT_USAGE.get(project)
     if not target_usage:
         return None
 
-    for row in rows[1:]:
-        tds = row.find_all("td")
-        if len(tds) != len(headers):
-            continue
-
-        values = [td.get_text(strip=True) for td in tds]
-        data = dict(zip(headers, values))
-
-        if data.get("用 途") != target_usage:
-            continue
-
-        return SalesStats(
-            signed_units=int(data["已签约套数"]),
-            signed_area=float(data["已签约面积(M2)"]),
-            avg_price=float(data["成交均价(￥/M2)"]),
-        )
-
-    return None
+    return parse_presale_contract_stats_all(html).get(target_usage)
 
 def build_house_area_map(project: str) -> Dict[str, Dict[str, float]]:
     """构建房源面积映射（按项目）"""
@@ -110,12 +79,11 @@ def build_house_area_map(project: str) -> Dict[str, Dict[str, float]]:
     if not os.path.exists(areas_file):
         raise FileNotFoundError(f"面积数据文件不存在: {areas_file}")
 
-    with open(areas_file, 'r', encoding='utf-8') as f:
-        areas_data = json.load(f)
+    areas_data = load_file(areas_file, Dict[str, BuildingData])
 
     house_area_map = {}
     for building, bdata in areas_data.items():
-        house_area_map[building] = {h["house_no"]: h.get("area", 0.0) for h in bdata.get("house_data", [])}
+        house_area_map[building] = {h.house_no: h.area for h in bdata.house_data}
 
     return house_area_map
 
@@ -144,6 +112,22 @@ def calculate_incremental_data(stats: SalesStats, base_record: Optional[Dict]) -
     return delta_area, delta_total, delta_unit
 
 
+def build_daily_record(date: str, stats: SalesStats, base_record: Optional[Dict]) -> Tuple[Dict, float]:
+    """生成某天的汇总记录（成交户号为空），返回 (记录, 新增签约面积)"""
+    delta_area, delta_total, delta_unit = calculate_incremental_data(stats, base_record)
+    record = {
+        "日期": date,
+        "已签约套数": stats.signed_units,
+        "已签约面积(M2)": round(stats.signed_area, 2),
+        "成交均价(￥/M2)": round(stats.avg_price, 2),
+        "成交户号": [],  # 初始化为空列表
+        "面积(M2)": delta_area if delta_area > 0 else "",
+        "总价(￥)": delta_total,
+        "均价(￥/M2)": delta_unit,
+    }
+    return record, delta_area
+
+
 def process_status_changes(changes: List[StatusChange], house_area_map: Dict[str, Dict[str, float]]) -> List[Dict]:
     """处理状态变化，添加面积信息"""
     processed_changes = []
@@ -164,60 +148,95 @@ def process_status_changes(changes: List[StatusChange], house_area_map: Dict[str
     return processed_changes
 
 
-def update_sales_data(project: str = "house") -> bool:
-    """主数据更新流程（支持选择项目）"""
+def update_sales_data(project: str = "house", engine: str = None) -> bool:
+    """主数据更新流程（支持选择项目）
+    engine: 状态抓取引擎（'threads' 或 'async'），默认取配置
+    默认在确认当天有新增签约面积后才抓取楼栋状态；开启 SPECULATIVE_STATUS_SCRAPE 时，
+    楼栋状态抓取与统计页请求同时开始，无新增签约则取消该抓取（已发出的请求无法收回）
+    开启 STREAM_STATUS_SNAPSHOT 时，状态快照逐个楼栋流式写入并比较，确认有新增签约后才提交
+    """
+    cancel_status = threading.Event()
+    status_executor = ThreadPoolExecutor(max_workers=1)
+    status_future = None
     try:
         cfg = get_project_config(project)
         data_url = cfg["DATA_URL"]
-        total_file = cfg["TOTAL_FILE"]
-
-        # 构建房源面积映射
-        house_area_map = build_house_area_map(project)
+        total_file = cfg["TOTAL_DB"] if TOTAL_BACKEND == "sqlite" else cfg["TOTAL_FILE"]
 
         # 使用时区感知的当前日期（默认 Asia/Shanghai）
         today = now_in_zone().strftime("%Y-%m-%d")
 
+        if SPECULATIVE_STATUS_SCRAPE:
+            if STREAM_STATUS_SNAPSHOT:
+                status_future = status_executor.submit(collect_status_changes, project, today, engine, cancel_status)
+            else:
+                status_future = status_executor.submit(scrape_status_data, project, engine, cancel_status)
+
+        # 构建房源面积映射
+        house_area_map = build_house_area_map(project)
+
         logger.info("🌐 请求页面...")
-        resp = requests.get(data_url, headers=HEADERS, timeout=15)
-        resp.raise_for_status()
-        resp.encoding = "utf-8"
+        html = fetch_text(data_url, timeout=15, encoding="utf-8")
 
-        stats = parse_presale_contract_stats(resp.text, project)
+        stats = parse_presale_contract_stats(html, project)
         if not stats:
             logger.error("❌ 未获取期房签约统计")
             return False
 
-        data_by_date = read_json_as_dict(total_file)
-        base_record = find_base_record(data_by_date, today)
+        base_record = load_base_record(project, today)
 
-        # 计算增量数据
-        delta_area, delta_total, delta_unit = calculate_incremental_data(stats, base_record)
-
-        # 写入当天数据
-        data_by_date[today] = {
-            "日期": today,
-            "已签约套数": stats.signed_units,
-            "已签约面积(M2)": round(stats.signed_area, 2),
-            "成交均价(￥/M2)": round(stats.avg_price, 2),
-            "成交户号": [],  # 初始化为空列表
-            "面积(M2)": delta_area if delta_area > 0 else "",
-            "总价(￥)": delta_total,
-            "均价(￥/M2)": delta_unit,
-        }
+        # 计算增量数据并生成当天数据
+        record, delta_area = build_daily_record(today, stats, base_record)
 
         # 如果有新数据，处理状态变化
         if delta_area > 0:
-            changes = get_status_changes(project)
+            if not STREAM_STATUS_SNAPSHOT:
+                status_data = status_future.result() if status_future else None
+                changes = get_status_changes(project, engine=engine, status_data=status_data)
+            elif status_future:
+                status_stream, changes = status_future.result()
+                status_stream.commit()
+            else:
+                changes = list(stream_status_changes(project, today, engine=engine))
             if changes:
                 processed_changes = process_status_changes(changes, house_area_map)
-                data_by_date[today]["成交户号"] = processed_changes
+                record["成交户号"] = processed_changes
+        elif status_future:
+            logger.info("🛑 无新增签约，取消预先启动的楼栋状态抓取")
+            cancel_status.set()
 
-        # 重写JSON文件
-        write_json(data_by_date, total_file)
+        # 写入当天数据（同日覆盖）
+        save_record(project, record)
 
         logger.info(f"✅ {today} 数据已写入（同日自动覆盖）：{total_file}")
+
+        # 生成看板视图（失败不影响数据更新，看板会即时计算）
+        try:
+            save_view(project)
+        except Exception as e:
+            logger.warning(f"⚠️ 看板视图生成失败：{e}")
         return True
 
     except Exception as e:
         logger.error(f"❌ 数据更新失败: {e}")
-        return False
\ No newline at end of file
+        return False
+
+    finally:
+        cancel_status.set()
+        status_executor.shutdown(wait=True)
+        if STREAM_STATUS_SNAPSHOT and status_future is not None and status_future.exception() is None:
+            # 未提交的流式快照直接丢弃（已提交时无操作）
+            status_future.result()[0].abort()
+
+
+def update_all_sales_data(projects: List[str] = None, engine: str = None) -> Dict[str, bool]:
+    """在同一进程内并发更新多个项目（默认全部项目）
+    所有项目共用一次运行级 URL 缓存：共用的列表页 / 统计页 / 楼盘表只下载一次；
+    请求速率与并发由全局限速器统一控制
+    """
+    projects = projects or list(PROJECTS.keys())
+
+    with shared_fetch_cache():
+        with ThreadPoolExecutor(max_workers=len(projects)) as executor:
+            futures = {project: executor.submit(update_sales_data, project, engine) for project in projects}
+            return {project: future.result() for project, future in futures.items()}
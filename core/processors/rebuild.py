@@ -0,0 +1,69 @@
+"""
+由快照历史重建 total.json
+当解析或匹配逻辑变化时，无需重新抓取即可重算每天的增量数据与成交户号：
+- 增量数据由记录中的签约统计与上一条记录重新计算（第一条记录没有基准，保持不变）
+- 成交户号由当天快照与此前最近一次快照的状态变化，结合面积数据重新生成
+- 当天没有快照时保留原有的成交户号
+- 快照比较通过快照索引进行，只展开内容有变化的楼栋，在当前进程内顺序执行即可
+json 后端的输出格式与 write_json 完全一致，可直接与原文件比较
+"""
+import logging
+from bisect import bisect_left
+from typing import Dict, List, Optional
+
+from ..models import SalesStats
+from ..storage.snapshot_index import get_index
+from ..storage.total_store import load_total, save_total
+from .data_processor import build_daily_record, build_house_area_map, process_status_changes
+from .view_model import save_view
+
+logger = logging.getLogger(__name__)
+
+
+def deals_between(project: str, prev_date: str, date: str,
+                  house_area_map: Dict[str, Dict[str, float]]) -> List[Dict]:
+    """两个快照之间的成交户号"""
+    changes = get_index(project).diff(prev_date, date)
+    return process_status_changes(changes, house_area_map)
+
+
+def rebuild_total(project: str = 'house', start: Optional[str] = None, end: Optional[str] = None) -> int:
+    """重建项目的 total.json，返回内容有变化的记录数
+    start / end: 只重算日期落在 [start, end] 内的记录（基准记录仍取其前一条）
+    """
+    data_by_date = load_total(project)
+    dates = sorted(data_by_date)
+    house_area_map = build_house_area_map(project)
+    snapshot_dates = get_index(project).dates()
+
+    records = {}
+    pairs = {}
+    for i, date in enumerate(dates):
+        if i == 0 or (start and date < start) or (end and date > end):
+            continue
+
+        old = data_by_date[date]
+        stats = SalesStats(
+            signed_units=old["已签约套数"],
+            signed_area=float(old["已签约面积(M2)"]),
+            avg_price=float(old["成交均价(￥/M2)"]),
+        )
+        record, delta_area = build_daily_record(date, stats, data_by_date[dates[i - 1]])
+        records[date] = record
+
+        pos = bisect_left(snapshot_dates, date)
+        if pos == len(snapshot_dates) or snapshot_dates[pos] != date:
+            record["成交户号"] = old["成交户号"]
+        elif delta_area > 0 and pos > 0:
+            pairs[date] = snapshot_dates[pos - 1]
+
+    logger.info(f"🔁 重算 {len(records)} 条记录，比较 {len(pairs)} 对快照")
+    for date, prev_date in pairs.items():
+        records[date]["成交户号"] = deals_between(project, prev_date, date, house_area_map)
+
+    changed = sum(1 for date, record in records.items() if record != data_by_date[date])
+    data_by_date.update(records)
+    save_total(project, data_by_date)
+    save_view(project, data_by_date)
+    logger.info(f"✅ 已重建 {project} 汇总数据（{changed} 条记录有变化）")
+    return changed
@@ -0,0 +1,85 @@
+"""
+多日状态变化计算
+基于列式状态历史（日期 × 房屋 的状态编码矩阵），一次性向量化计算全部快照之间的状态变化，
+得到逐户的变化记录。判定规则与 compare_status_changes 一致：
+- 相邻两个快照之间比较（快照之间可能间隔多天）
+- 当天不存在的房屋不记录；前一快照中整栋楼不存在时跳过该楼栋
+- 前一快照中楼栋存在但没有该房屋时，前状态记为“不存在”
+- 无法识别的状态值在状态历史中统一编码为 OTHER_STATUS
+"""
+import logging
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from ..config import STATUS_NAMES
+from ..models import StatusChange
+from ..storage.history import StatusHistory, MISSING, migrate_history
+from ..storage.snapshot_index import get_index
+
+logger = logging.getLogger(__name__)
+
+ABSENT_STATUS = '不存在'
+
+TRANSITION_COLUMNS = ["building_name", "house_no", "prev_date", "date", "prev_status", "curr_status"]
+
+
+def load_history(project: str = 'house') -> StatusHistory:
+    """打开项目的状态历史；与快照目录不一致时先重建"""
+    history = StatusHistory.open(project)
+    if history.dates != get_index(project).dates():
+        logger.info("状态历史与快照不一致，重新生成")
+        history = migrate_history(project)
+    return history
+
+
+def transition_log(project: str = 'house', start: Optional[str] = None,
+                   end: Optional[str] = None) -> pd.DataFrame:
+    """计算快照历史中的全部状态变化
+    start / end: 只返回 date 落在 [start, end] 内的变化（比较仍以相邻快照为准）
+    返回列：building_name, house_no, prev_date, date, prev_status, curr_status
+    """
+    history = load_history(project)
+    if len(history.dates) < 2 or not history.houses:
+        return pd.DataFrame(columns=TRANSITION_COLUMNS)
+
+    codes = np.asarray(history.matrix())
+    prev, curr = codes[:-1], codes[1:]
+
+    # 每个快照中各楼栋是否存在（取自快照索引；抓取失败的楼栋可能存在但没有房屋）
+    index = get_index(project)
+    keys = np.array([h.split("\t", 1) for h in history.houses], dtype=object)
+    buildings, building_of = np.unique(keys[:, 0].astype(str), return_inverse=True)
+    building_present = np.array([
+        [name in index.entries[date]["buildings"] for name in buildings]
+        for date in history.dates
+    ], dtype=bool)
+
+    changed = (curr != prev) & (curr != MISSING) & building_present[:-1][:, building_of]
+    rows, cols = np.nonzero(changed)
+
+    dates = np.array(history.dates, dtype=object)
+    names = np.array(STATUS_NAMES + [ABSENT_STATUS] * (MISSING + 1 - len(STATUS_NAMES)), dtype=object)
+    log = pd.DataFrame({
+        "building_name": keys[cols, 0],
+        "house_no": keys[cols, 1],
+        "prev_date": dates[rows],
+        "date": dates[rows + 1],
+        "prev_status": names[prev[rows, cols]],
+        "curr_status": names[curr[rows, cols]],
+    }, columns=TRANSITION_COLUMNS)
+
+    if start is not None:
+        log = log[log["date"] >= start]
+    if end is not None:
+        log = log[log["date"] <= end]
+    return log.reset_index(drop=True)
+
+
+def to_status_changes(log: pd.DataFrame) -> List[StatusChange]:
+    """把变化记录转换为 StatusChange 列表"""
+    return [
+        StatusChange(building_name=b, house_no=h, prev_status=p, curr_status=c)
+        for b, h, p, c in zip(log["building_name"], log["house_no"], log["prev_status"], log["curr_status"])
+    ]
@@ -0,0 +1,295 @@
+"""
+看板视图数据（view.json）
+每次更新数据后预先计算看板需要的全部内容，app.py 直接渲染，渲染耗时与历史长度无关：
+- kpi：顶部累计指标（已格式化）
+- series：价格走势图的日期与两条曲线（无效值为 null），以及渐变基线与纵轴范围
+- prices：有当日均价的日期 -> 当日均价及与上一个有均价日期的环比
+- deals：有当日均价的日期 -> 成交明细卡片（房号、面积、总价均已格式化）
+- dates / latest_valid_date：日期查找表
+source 为生成时数据文件的内容哈希，数据文件变化后看板会忽略过期的 view.json
+DashboardModel 在视图之上建立按日期的索引（DatetimeIndex + 二分查找），看板按项目与数据版本缓存一份
+"""
+import os
+import math
+import hashlib
+import logging
+from bisect import bisect_left, bisect_right
+from datetime import date
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from ..config import get_project_config, TOTAL_BACKEND
+from ..storage.total_store import load_total
+from ..utils.serialization import load_file, dump_file
+
+logger = logging.getLogger(__name__)
+
+VIEW_VERSION = 1
+NO_HOUSE_NO = "无户号"
+
+
+def source_digest(project: str) -> Optional[str]:
+    """当前后端数据文件的内容哈希（文件不存在时返回 None）"""
+    cfg = get_project_config(project)
+    path = cfg["TOTAL_DB"] if TOTAL_BACKEND == "sqlite" else cfg["TOTAL_FILE"]
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _number(value) -> Optional[float]:
+    """与看板一致的数值转换：空字符串等无效值视为缺失"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(value) else value
+
+
+def display_house_no(building_name: str, house_no: str) -> str:
+    """成交卡片上的房号（如 5-12#住宅楼 + 1-101 -> 12#1-101）"""
+    if building_name and house_no:
+        return f"{building_name.replace('#住宅楼', '').replace('5-', '')}#{house_no}"
+    return f"{building_name} {house_no}".strip() or "未知房号"
+
+
+def _deal_card(building_name: str, house_no: str, area, price: float, total=None) -> Dict[str, str]:
+    area_val = _number(area)
+    if area_val and area_val > 0:
+        price_str = f"¥{area_val * price:,.2f}"
+    elif total is not None:
+        price_str = f"¥{total:,.2f}"
+    else:
+        price_str = "N/A"
+    return {"house": display_house_no(building_name, house_no), "area": str(area), "price": price_str}
+
+
+def deal_cards(record: Dict) -> List[Dict[str, str]]:
+    """一天的成交明细卡片；没有户号但有面积或总价时生成一条“无户号”记录"""
+    price = _number(record.get("均价(￥/M2)"))
+    if not price:
+        return []
+
+    houses = record.get("成交户号") or []
+    if houses:
+        return [_deal_card(h.get("building_name", ""), h.get("house_no", ""), h.get("area", 0), price)
+                for h in houses]
+
+    area, total = _number(record.get("面积(M2)")), _number(record.get("总价(￥)"))
+    if area is None and total is None:
+        return []
+    return [_deal_card("", NO_HOUSE_NO, area if area is not None else 0, price, total)]
+
+
+def build_view(project: str = 'house', data_by_date: Dict[str, Dict] = None) -> Dict:
+    """由汇总数据计算看板视图"""
+    data_by_date = load_total(project) if data_by_date is None else data_by_date
+    dates = sorted(data_by_date)
+    records = [data_by_date[d] for d in dates]
+
+    primary = [_number(r.get("成交均价(￥/M2)")) for r in records]
+    secondary = [_number(r.get("均价(￥/M2)")) for r in records]
+
+    # 渐变基线：两条曲线的最小值减去 5% 缓冲
+    values = [v for v in primary + secondary if v is not None]
+    if values:
+        low, high = min(values), max(values)
+        span = (high - low) or max(abs(low) * 0.02, 1.0)
+        baseline, y_range = low - span * 0.05, [low, high]
+    else:
+        baseline, y_range = 0.0, None
+
+    kpi = []
+    if records:
+        latest = records[-1]
+        avg_price = _number(latest.get("成交均价(￥/M2)"))
+        kpi = [
+            {"label": "累计签约套数", "value": str(int(latest["已签约套数"]))},
+            {"label": "累计签约面积 (㎡)", "value": f"{float(latest['已签约面积(M2)']):,.1f}"},
+            {"label": "累计成交均价", "value": "N/A" if avg_price is None else f"¥{avg_price:,.2f}"},
+        ]
+
+    # 有当日均价的日期及环比（与上一个有均价的日期比较）
+    prices, deals = {}, {}
+    prev_price = None
+    for day, record, price in zip(dates, records, secondary):
+        if not price or price <= 0:
+            continue
+        if prev_price is None:
+            change = {"text": "—", "class": "none"}
+        else:
+            pct = (price - prev_price) / prev_price * 100
+            change = {"text": f"{'↑' if pct > 0 else '↓'} {abs(pct):.1f}%", "class": "up" if pct > 0 else "down"}
+        prices[day] = {"price": price, "change": change}
+        deals[day] = deal_cards(record)
+        prev_price = price
+
+    return {
+        "version": VIEW_VERSION,
+        "project": project,
+        "source": source_digest(project),
+        "dates": dates,
+        "latest_valid_date": next(reversed(prices), None),
+        "kpi": kpi,
+        "series": {
+            "dates": dates,
+            "avg_price": primary,
+            "daily_price": secondary,
+            "baseline": baseline,
+            "y_range": y_range,
+        },
+        "prices": prices,
+        "deals": deals,
+    }
+
+
+def save_view(project: str = 'house', data_by_date: Dict[str, Dict] = None) -> str:
+    """生成并写入 data/{project}/view.json，返回文件路径"""
+    view_file = get_project_config(project)["VIEW_FILE"]
+    view = build_view(project, data_by_date)
+    os.makedirs(os.path.dirname(view_file), exist_ok=True)
+    dump_file(view, view_file, atomic=True)
+    logger.info(f"🖼️ 看板视图已生成：{view_file}")
+    return view_file
+
+
+def load_view(project: str = 'house') -> Dict:
+    """读取 view.json；不存在、格式过期或与数据文件不一致时即时重新计算（不写入文件）"""
+    view_file = get_project_config(project)["VIEW_FILE"]
+    if os.path.exists(view_file):
+        try:
+            view = load_file(view_file)
+            if view.get("version") == VIEW_VERSION and view.get("source") == source_digest(project):
+                return view
+        except ValueError as e:
+            logger.warning(f"⚠️ 看板视图读取失败：{e}")
+    return build_view(project)
+
+
+class DashboardModel:
+    """看板查询模型：日期查找均为 O(log n)，不随历史长度逐行扫描"""
+
+    def __init__(self, view: Dict):
+        self.view = view
+        self.dates: List[str] = view["dates"]
+        self.index = pd.DatetimeIndex(pd.to_datetime(self.dates))
+        self.avg_price = pd.Series(view["series"]["avg_price"], index=self.index, dtype=float)
+        self.daily_price = pd.Series(view["series"]["daily_price"], index=self.index, dtype=float)
+
+        self.prices: Dict[str, Dict] = view["prices"]
+        self.valid_dates: List[str] = sorted(self.prices)
+        # 有当日均价 / 有成交明细卡片的日期
+        self.price_mask = np.isin(self.dates, self.valid_dates)
+        self.deal_mask = np.isin(self.dates, [d for d, cards in view["deals"].items() if cards])
+
+    @property
+    def empty(self) -> bool:
+        return not self.dates
+
+    @property
+    def kpi(self) -> List[Dict[str, str]]:
+        return self.view["kpi"]
+
+    @property
+    def series(self) -> Dict:
+        return self.view["series"]
+
+    @property
+    def latest_date(self) -> Optional[str]:
+        return self.dates[-1] if self.dates else None
+
+    @property
+    def latest_valid_date(self) -> Optional[str]:
+        return self.valid_dates[-1] if self.valid_dates else None
+
+    def position(self, day: Union[str, date]) -> Optional[int]:
+        """日期在 dates 中的位置，没有该日期的数据时返回 None"""
+        day = str(day)
+        pos = bisect_left(self.dates, day)
+        return pos if pos < len(self.dates) and self.dates[pos] == day else None
+
+    def nearest(self, day: date) -> int:
+        """距离最近的有数据日期的位置（距离相同时取较早的日期）"""
+        pos = bisect_left(self.dates, str(day))
+        candidates = range(max(pos - 1, 0), min(pos + 1, len(self.dates)))
+        return min(candidates, key=lambda i: abs((date.fromisoformat(self.dates[i]) - day).days))
+
+    def previous_valid(self, day: Union[str, date]) -> Optional[str]:
+        """严格早于该日期、有当日均价的最近日期"""
+        pos = bisect_left(self.valid_dates, str(day))
+        return self.valid_dates[pos - 1] if pos > 0 else None
+
+    def next_valid(self, day: Union[str, date]) -> Optional[str]:
+        """严格晚于该日期、有当日均价的最近日期"""
+        pos = bisect_right(self.valid_dates, str(day))
+        return self.valid_dates[pos] if pos < len(self.valid_dates) else None
+
+    def price(self, day: str) -> Optional[Dict]:
+        """当日均价与环比 {"price", "change": {"text", "class"}}，无当日均价时返回 None"""
+        return self.prices.get(day)
+
+    def deals(self, day: str) -> List[Dict[str, str]]:
+        """当天的成交明细卡片"""
+        return self.view["deals"].get(day, [])
+
+
+TRANSACTION_COLUMNS = ['日期', '楼栋', '房号', '建筑面积(㎡)', '单价(￥/M2)', '总价(￥)']
+
+
+def transaction_table(df: pd.DataFrame) -> pd.DataFrame:
+    """全部成交明细（每条成交户号一行，按日期升序）
+    df: 看板的汇总数据 DataFrame（日期已转为 datetime，数值列已转为数值）
+    总价优先使用 建筑面积 × 当日均价，面积无效时使用当天的总价；当天有均价但没有户号时，
+    若存在面积或总价则合成一条“无户号”记录
+    """
+    if df.empty:
+        return pd.DataFrame(columns=TRANSACTION_COLUMNS)
+
+    rows = pd.DataFrame({
+        '日期': df['日期'].dt.strftime('%Y-%m-%d').to_numpy(),
+        'price': df['均价(￥/M2)'].to_numpy(dtype=float),
+        'area': df['面积(M2)'].to_numpy(dtype=float),
+        'total': df['总价(￥)'].to_numpy(dtype=float),
+        'houses': df['成交户号'].to_numpy(),
+    })
+    has_price = rows['price'].notna() & (rows['price'] != 0)
+    has_houses = rows['houses'].map(lambda h: isinstance(h, list) and len(h) > 0)
+
+    # 有户号：每户一行
+    deals = rows[has_houses].explode('houses')
+    houses = pd.json_normalize(deals['houses'].tolist()).reindex(columns=['building_name', 'house_no', 'area'])
+    deal_area = pd.to_numeric(houses['area'], errors='coerce').to_numpy()
+    deal_price = deals['price'].to_numpy()
+    use_area = has_price[deals.index].to_numpy() & ~np.isnan(deal_area) & (deal_area != 0)
+    deal_rows = pd.DataFrame({
+        'order': deals.index.to_numpy(),
+        '日期': deals['日期'].to_numpy(),
+        '楼栋': houses['building_name'].fillna('').to_numpy(),
+        '房号': houses['house_no'].fillna('').to_numpy(),
+        '建筑面积(㎡)': deal_area,
+        '单价(￥/M2)': deal_price,
+        '总价(￥)': np.where(use_area, deal_area * deal_price, deals['total'].to_numpy()),
+    })
+
+    # 无户号但有面积或总价：合成一条记录
+    extra = rows[~has_houses & (rows['area'].notna() | rows['total'].notna())]
+    use_area = has_price[extra.index].to_numpy() & (extra['area'].to_numpy() != 0)
+    extra_rows = pd.DataFrame({
+        'order': extra.index.to_numpy(),
+        '日期': extra['日期'].to_numpy(),
+        '楼栋': '',
+        '房号': NO_HOUSE_NO,
+        '建筑面积(㎡)': extra['area'].to_numpy(),
+        '单价(￥/M2)': extra['price'].to_numpy(),
+        '总价(￥)': np.where(use_area, extra['area'].to_numpy() * extra['price'].to_numpy(), extra['total'].to_numpy()),
+    })
+
+    table = pd.concat([deal_rows, extra_rows], ignore_index=True)
+    table = table.sort_values('order', kind='stable')[TRANSACTION_COLUMNS].reset_index(drop=True)
+    table['建筑面积(㎡)'] = table['建筑面积(㎡)'].astype(float)
+    table['单价(￥/M2)'] = table['单价(￥/M2)'].astype(float)
+    table['总价(￥)'] = table['总价(￥)'].astype(float)
+    return table
@@ -2,4 +2,5 @@
 初始化抓取模块
 """
 from .area_scraper import *
-from .status_scraper import *
\ No newline at end of file
+from .status_scraper import *
+from .building_scraper import *
\ No newline at end of file
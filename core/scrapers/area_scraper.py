@@ -2,35 +2,37 @@
 面积数据抓取模块
 负责抓取楼栋和房源面积信息
 """
-import json
+import os
 import re
-import requests
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Dict, List, Optional, Tuple
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlparse, parse_qs
 
-from ..config import HEADERS, get_project_config
-from ..utils import fetch_html, get_buildings_url, safe_delay
+from ..config import get_project_config, AREAS_CHECKPOINT_EVERY
+from ..utils.pipeline import fetch_and_parse
+from ..parsers import get_parser
 from ..models import HouseData, BuildingData
+from ..utils.serialization import load_file, dump_file
 
 logger = logging.getLogger(__name__)
 
-def extract_house_links(html: str) -> List[Dict]:
+def house_id_from_url(url: str) -> str:
+    """从房源详情页链接中提取 houseId"""
+    return parse_qs(urlparse(url).query).get("houseId", [""])[0]
+
+def extract_house_links(html: str, base_url: str = None) -> List[Dict]:
     """提取房号链接"""
-    soup = BeautifulSoup(html, "html.parser")
+    base_url = base_url or get_project_config().get('BASE_URL')
     houses = []
 
-    for a in soup.find_all("a", href=True):
-        href = a["href"]
+    for href, house_no in get_parser().anchors(html):
         # 房号详情页的固定特征
         if "pageId=373432" in href and "houseId=" in href:
-            house_no = a.get_text(strip=True)
-            full_url = urljoin(BASE_URL, href)
+            full_url = urljoin(base_url, href)
             full_url = full_url.replace("https://", "http://", 1)
             houses.append({
                 "house_no": house_no,
+                "house_id": house_id_from_url(full_url),
                 "url": full_url
             })
 
@@ -38,92 +40,143 @@ def extract_house_links(html: str) -> List[Dict]:
 
 def extract_build_area(html: str) -> Optional[float]:
     """提取建筑面积"""
-    soup = BeautifulSoup(html, "html.parser")
-
-    for tr in soup.find_all("tr"):
-        tds = tr.find_all("td")
-        if len(tds) == 2:
-            left = tds[0].get_text(strip=True)
-            if "建筑面积" in left:
-                right = tds[1].get_text(strip=True)
-                m = re.search(r"([\d.]+)", right)
-                if m:
-                    return float(m.group(1))
+    for left, right in get_parser().two_cell_rows(html):
+        if "建筑面积" in left:
+            m = re.search(r"([\d.]+)", right)
+            if m:
+                return float(m.group(1))
 
     return None
 
-def process_building_data(bid: str, url: str) -> Tuple[str, List[HouseData]]:
-    """处理单个楼栋的房源信息"""
-    logger.info(f"🌐 正在请求楼盘表页面{bid} :{url}...")
-    try:
-        resp = requests.get(url, headers=HEADERS, timeout=10)
-        resp.encoding = "utf-8"
+def _parse_house_area(key: Tuple[str, str], html: str) -> Optional[float]:
+    """解析阶段：房源详情页 -> 建筑面积"""
+    return extract_build_area(html)
 
-        houses = extract_house_links(resp.text)
-        logger.info(f"🏠 共找到 {len(houses)} 套房源")
+def _write_json_atomic(path: str, data, indent: int = None):
+    """先写临时文件再替换，避免中途退出留下半个文件"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    dump_file(data, path, indent=indent, atomic=True)
 
-        building_data = []
+def load_known_areas(areas_file: str) -> Tuple[Dict[str, float], Dict[Tuple[str, str], float]]:
+    """读取已有 areas.json，返回 (按 houseId 索引, 按 (楼栋, 房号) 索引) 的面积
+    旧版文件没有 house_id 字段，只能按 (楼栋, 房号) 匹配
+    """
+    by_id, by_no = {}, {}
+    if not os.path.exists(areas_file):
+        return by_id, by_no
+
+    areas_data = load_file(areas_file)
+
+    for bid, bdata in areas_data.items():
+        for h in bdata.get("house_data", []):
+            area = h.get("area")
+            if area is None:
+                continue
+            if h.get("house_id"):
+                by_id[h["house_id"]] = area
+            by_no[(bid, h["house_no"])] = area
+    return by_id, by_no
+
+def load_areas_checkpoint(checkpoint_file: str) -> Dict[str, float]:
+    """读取断点文件（houseId -> 面积），不存在时返回空字典"""
+    if not os.path.exists(checkpoint_file):
+        return {}
+    try:
+        return load_file(checkpoint_file)
+    except (OSError, ValueError) as e:
+        logger.warning(f"⚠️ 断点文件无法读取，忽略：{e}")
+        return {}
 
-        for idx, h in enumerate(houses, 1):
-            logger.debug(f"[{idx}/{len(houses)}] 解析 {h['house_no']} ...")
-            try:
-                r = requests.get(h["url"], headers=HEADERS, timeout=10)
-                r.encoding = "utf-8"
-                area = extract_build_area(r.text)
-                logger.debug(f"  建筑面积: {area} 平方米")
-                if area is None:
-                    logger.warning(f"❌ 未找到建筑面积")
-                    continue
-
-                building_data.append(HouseData(
-                    house_no=h["house_no"],
-                    area=area
-                ))
-
-                safe_delay()  # 防止请求过快
-            except Exception as e:
-                logger.error(f"❌ {h['house_no']} 解析失败：{e}")
-
-        return bid, building_data
-    except Exception as e:
-        logger.error(f"❌ 请求楼盘页面失败：{e}")
-        return bid, []
-
-def scrape_areas_data(project: str = 'house', output_file: str = None) -> Dict[str, BuildingData]:
+def scrape_areas_data(project: str = 'house', output_file: str = None, incremental: bool = True) -> Dict[str, BuildingData]:
     """主流程：抓取所有楼栋面积数据（按项目）
     output_file 可被覆盖，否则默认写入 data/{project}/areas/areas.json
+    incremental: 为 True 时只抓取 areas.json 中尚不存在的房源（按 houseId），
+                 并支持从断点文件恢复；为 False 时全部重新抓取
     """
+    cfg = get_project_config(project)
     if output_file is None:
-        cfg = get_project_config(project)
         output_file = cfg.get('AREAS_FILE')
+    checkpoint_file = cfg.get('AREAS_CHECKPOINT_FILE')
+
+    from .building_scraper import scrape_buildings
+
+    # 第一轮：楼盘表页面 -> 房号链接（与状态抓取共用同一次下载）
+    pages = scrape_buildings(project=project)
+    house_links = {bid: page.house_links for bid, page in pages.items()}
+
+    # 已知面积：已有 areas.json + 上次中断留下的断点
+    if incremental:
+        known_by_id, known_by_no = load_known_areas(output_file)
+        checkpoint = load_areas_checkpoint(checkpoint_file)
+        if checkpoint:
+            logger.info(f"♻️ 从断点恢复 {len(checkpoint)} 套房源面积")
+        known_by_id.update(checkpoint)
+    else:
+        known_by_id, known_by_no, checkpoint = {}, {}, {}
+
+    def _known_area(bid: str, h: Dict) -> Optional[float]:
+        if h["house_id"] in known_by_id:
+            return known_by_id[h["house_id"]]
+        return known_by_no.get((bid, h["house_no"]))
+
+    # 第二轮：房源详情页 -> 建筑面积（只抓取未知房源）
+    detail_tasks = {}
+    for bid, houses in house_links.items():
+        pending = [h for h in houses if _known_area(bid, h) is None]
+        logger.info(f"🏠 {bid} 共找到 {len(houses)} 套房源，需抓取 {len(pending)} 套")
+        for h in pending:
+            detail_tasks[h["house_id"] or (bid, h["house_no"])] = h["url"]
+
+    def _save_checkpoint(key, area):
+        if not isinstance(key, str):
+            return
+        checkpoint[key] = area
+        if len(checkpoint) % AREAS_CHECKPOINT_EVERY == 0:
+            _write_json_atomic(checkpoint_file, checkpoint)
+
+    areas = fetch_and_parse(detail_tasks, _parse_house_area, timeout=10, on_result=_save_checkpoint)
 
-    BUILDING_URLS = get_buildings_url(project=project)
     data = {}
-
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        futures = {executor.submit(process_building_data, bid, url): bid
-                  for bid, url in BUILDING_URLS.items()}
-
-        for future in as_completed(futures):
-            bid, building_data = future.result()
-
-            if building_data:
-                data[bid] = BuildingData(
-                    building_name=bid,
-                    house_data=building_data
-                )
+    for bid, houses in house_links.items():
+        building_data = []
+        for h in houses:
+            area = areas.get(h["house_id"] or (bid, h["house_no"]))
+            if area is None:
+                area = _known_area(bid, h)
+            if area is None:
+                logger.warning(f"❌ {bid} {h['house_no']} 未找到建筑面积")
+                continue
+            building_data.append(HouseData(
+                house_no=h["house_no"],
+                area=area,
+                house_id=h["house_id"]
+            ))
+
+        if building_data:
+            data[bid] = BuildingData(
+                building_name=bid,
+                house_data=building_data
+            )
+
+    # 转换为字典格式以保持兼容性
+    dict_data = {}
+    for bid, bdata in data.items():
+        dict_data[bid] = {
+            "building_name": bdata.building_name,
+            "house_data": [{"house_no": h.house_no, "area": h.area, "house_id": h.house_id}
+                           for h in bdata.house_data]
+        }
+
+    if incremental and os.path.exists(output_file):
+        # 本次未能抓到楼盘表的楼栋保留原有数据
+        previous = load_file(output_file)
+        for bid, bdata in previous.items():
+            dict_data.setdefault(bid, bdata)
 
     # 导出 JSON
-    os.makedirs(os.path.dirname(output_file), exist_ok=True)
-    with open(output_file, "w", encoding="utf-8") as f:
-        # 转换为字典格式以保持兼容性
-        dict_data = {}
-        for bid, bdata in data.items():
-            dict_data[bid] = {
-                "building_name": bdata.building_name,
-                "house_data": [{"house_no": h.house_no, "area": h.area} for h in bdata.house_data]
-            }
-        json.dump(dict_data, f, ensure_ascii=False, indent=4)
+    _write_json_atomic(output_file, dict_data, indent=4)
+    if os.path.exists(checkpoint_file):
+        os.remove(checkpoint_file)
 
     logger.info(f"✅ 已导出数据到 {output_file}")
-    return data
\ No newline at end of file
+    return data
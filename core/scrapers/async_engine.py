@@ -0,0 +1,162 @@
+"""
+asyncio 抓取引擎
+- 使用 httpx.AsyncClient 复用连接
+- 通过信号量限制同时在途的请求数（ASYNC_MAX_CONCURRENCY），并与线程引擎共用全局令牌桶和 AIMD 并发控制
+- 每个请求单独超时；任一环节被取消时，未完成的请求会一并取消
+- 页面解析在进程池（PARSE_WORKERS）中进行，不阻塞事件循环上的其他请求
+- 与线程引擎共用运行级 URL 缓存（http.shared_fetch_cache），data all 中同一页面只下载一次
+接口与 utils.pipeline.fetch_and_parse 一致：tasks 为 {key: url}，parse_fn(key, html)
+"""
+import asyncio
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from ..config import HEADERS, REQUEST_TIMEOUT, ASYNC_MAX_CONCURRENCY, PARSE_WORKERS
+from ..utils.http import claim_fetch, settle_fetch
+from ..utils.rate_limit import RATE_LIMITER, CONCURRENCY, is_overload_status
+
+try:
+    import httpx
+    HAS_HTTPX = True
+except ImportError:
+    httpx = None
+    HAS_HTTPX = False
+
+logger = logging.getLogger(__name__)
+
+# 目标站点页面均为 UTF-8；与线程引擎使用相同的编码，两者的 URL 缓存键一致
+ENCODING = "utf-8"
+
+
+async def _download(client, key: Hashable, url: str, timeout: float) -> Optional[str]:
+    """在全局限速与并发控制下下载单个页面，失败返回 None"""
+    await RATE_LIMITER.acquire_async()
+    await CONCURRENCY.acquire_async()
+    success = False
+    try:
+        resp = await asyncio.wait_for(client.get(url), timeout=timeout)
+        success = not is_overload_status(resp.status_code)
+        resp.raise_for_status()
+        return resp.content.decode(ENCODING, errors="replace")
+    except asyncio.TimeoutError:
+        logger.error(f"  ❌ {key} 请求超时（{timeout}s）")
+        return None
+    except asyncio.CancelledError:
+        success = True  # 主动取消不是过载信号
+        raise
+    except Exception as e:
+        logger.error(f"  ❌ {key} 请求失败：{e}")
+        return None
+    finally:
+        CONCURRENCY.release(success)
+
+
+async def _fetch_cached(client, key: Hashable, url: str, timeout: float) -> Optional[str]:
+    """经运行级 URL 缓存下载：已有相同 URL 的下载（包括线程引擎发起的）时等待其结果"""
+    future, is_owner = claim_fetch(url, ENCODING)
+    if future is None:
+        return await _download(client, key, url, timeout)
+    if not is_owner:
+        try:
+            return await asyncio.wrap_future(future)
+        except Exception as e:
+            logger.error(f"  ❌ {key} 请求失败：{e}")
+            return None
+
+    try:
+        html = await _download(client, key, url, timeout)
+    except BaseException as e:
+        settle_fetch(url, ENCODING, future, error=e)
+        raise
+    if html is None:
+        settle_fetch(url, ENCODING, future, error=RuntimeError(f"请求失败：{url}"))
+    else:
+        settle_fetch(url, ENCODING, future, text=html)
+    return html
+
+
+async def _parse(executor: Optional[Executor], key: Hashable, html: str,
+                 parse_fn: Callable[[Hashable, str], Any]) -> Any:
+    """在执行器中解析页面，进程池不可用时退回默认线程池"""
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(executor, parse_fn, key, html)
+    except BrokenProcessPool:
+        return await loop.run_in_executor(None, parse_fn, key, html)
+
+
+async def _fetch_one(client, sem: asyncio.Semaphore, key: Hashable, url: str,
+                     parse_fn: Callable[[Hashable, str], Any], timeout: float,
+                     cancel: Optional[threading.Event], executor: Optional[Executor]) -> Any:
+    """在信号量限制下抓取单个页面，并在执行器中解析"""
+    async with sem:
+        if cancel is not None and cancel.is_set():
+            return None
+        html = await _fetch_cached(client, key, url, timeout)
+    if html is None:
+        return None
+
+    try:
+        return await _parse(executor, key, html, parse_fn)
+    except Exception as e:
+        logger.error(f"  ❌ 解析失败 {key}：{e}")
+        return None
+
+
+async def async_fetch_and_parse(tasks: Dict[Hashable, str],
+                                parse_fn: Callable[[Hashable, str], Any],
+                                max_concurrency: int = ASYNC_MAX_CONCURRENCY,
+                                parse_workers: int = PARSE_WORKERS,
+                                timeout: float = REQUEST_TIMEOUT,
+                                on_result: Optional[Callable[[Hashable, Any], None]] = None,
+                                cancel: Optional[threading.Event] = None) -> Dict[Hashable, Any]:
+    """并发抓取并解析所有页面（协程版本），返回 {key: parse_fn 结果}
+    on_result: 每得到一个结果即回调 on_result(key, result)
+    cancel: 被 set 后尚未开始的请求直接跳过
+    parse_workers <= 0 时在默认线程池中解析（parse_fn 须为模块级函数才能发送到子进程）
+    """
+    sem = asyncio.Semaphore(max_concurrency)
+    limits = httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency)
+    headers = dict(HEADERS, **{"Accept-Encoding": "gzip, deflate"})
+
+    async def _keyed(key, url):
+        return key, await _fetch_one(client, sem, key, url, parse_fn, timeout, cancel, executor)
+
+    executor = None
+    if parse_workers > 0:
+        executor = ProcessPoolExecutor(max_workers=parse_workers, mp_context=multiprocessing.get_context("spawn"))
+
+    results = {}
+    try:
+        async with httpx.AsyncClient(headers=headers, limits=limits, timeout=timeout) as client:
+            pending = [asyncio.ensure_future(_keyed(key, url)) for key, url in tasks.items()]
+            try:
+                for coro in asyncio.as_completed(pending):
+                    key, result = await coro
+                    if result is not None:
+                        results[key] = result
+                        if on_result is not None:
+                            on_result(key, result)
+            finally:
+                # 出错或被取消时，不再等待剩余请求
+                for task in pending:
+                    if not task.done():
+                        task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    return results
+
+
+def fetch_and_parse_async(tasks: Dict[Hashable, str],
+                          parse_fn: Callable[[Hashable, str], Any],
+                          on_result: Optional[Callable[[Hashable, Any], None]] = None,
+                          cancel: Optional[threading.Event] = None) -> Dict[Hashable, Any]:
+    """同步入口：在新的事件循环中运行 async_fetch_and_parse"""
+    return asyncio.run(async_fetch_and_parse(tasks, parse_fn, on_result=on_result, cancel=cancel))
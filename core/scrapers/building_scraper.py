@@ -0,0 +1,80 @@
+"""
+楼盘表抓取模块
+每个楼栋页面只抓取一次，同时解析出：
+- 各户销售状态（供 status_scraper 使用）
+- 房号、houseId 与详情页链接（供 area_scraper 使用）
+同一进程内的结果按项目缓存，面积与状态在同一次运行中刷新时不会重复下载楼盘表
+"""
+import logging
+import threading
+from typing import Callable, Dict, Optional
+
+from ..config import SCRAPE_ENGINE
+from ..utils import get_buildings_url
+from ..utils.pipeline import fetch_and_parse
+from ..models import BuildingPage
+from .status_scraper import parse_building_html
+from .area_scraper import extract_house_links
+
+logger = logging.getLogger(__name__)
+
+_pages_cache: Dict[str, Dict[str, BuildingPage]] = {}
+
+
+def parse_building_page(bid: str, html: str) -> BuildingPage:
+    """解析楼盘表页面：状态 + 房源链接"""
+    return BuildingPage(
+        building_name=bid,
+        status=parse_building_html(bid, html),
+        house_links=extract_house_links(html),
+    )
+
+
+def scrape_buildings(project: str = 'house', engine: str = None, refresh: bool = False,
+                     cancel: Optional[threading.Event] = None,
+                     on_result: Optional[Callable[[str, BuildingPage], None]] = None) -> Dict[str, BuildingPage]:
+    """抓取项目下所有楼盘表页面（按项目缓存）
+    engine: 'threads' 或 'async'，默认取 config.SCRAPE_ENGINE
+    refresh: 为 True 时忽略缓存重新抓取
+    cancel: 被 set 后停止发起新请求，返回的部分结果不写入缓存
+    on_result: 每完成一个楼栋即回调 on_result(bid, page)（命中缓存时依次回调全部楼栋）
+    """
+    if not refresh and project in _pages_cache:
+        logger.info(f"♻️ 复用本次运行已抓取的楼盘表：{project}")
+        if on_result is not None:
+            for bid, page in _pages_cache[project].items():
+                on_result(bid, page)
+        return _pages_cache[project]
+
+    engine = engine or SCRAPE_ENGINE
+    building_urls = get_buildings_url(project=project)
+    logger.info(f"共 {len(building_urls)} 个楼栋，开始抓取...")
+
+    if engine == "async":
+        from .async_engine import fetch_and_parse_async, HAS_HTTPX
+        if HAS_HTTPX:
+            pages = fetch_and_parse_async(building_urls, parse_building_page, on_result=on_result, cancel=cancel)
+        else:
+            logger.warning("未安装 httpx，回退到线程池引擎")
+            pages = fetch_and_parse(building_urls, parse_building_page, on_result=on_result, cancel=cancel)
+    elif engine == "threads":
+        pages = fetch_and_parse(building_urls, parse_building_page, on_result=on_result, cancel=cancel)
+    else:
+        raise ValueError(f"未知的抓取引擎: {engine}")
+
+    # 按楼栋列表顺序输出
+    pages = {bid: pages[bid] for bid in building_urls if bid in pages}
+    if cancel is not None and cancel.is_set():
+        logger.info(f"🛑 楼盘表抓取已取消：{project}")
+        return pages
+
+    _pages_cache[project] = pages
+    return pages
+
+
+def clear_buildings_cache(project: str = None):
+    """清除楼盘表缓存（不指定项目时全部清除）"""
+    if project is None:
+        _pages_cache.clear()
+    else:
+        _pages_cache.pop(project, None)
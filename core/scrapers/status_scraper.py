@@ -2,72 +2,44 @@
 状态数据抓取模块
 负责抓取房屋销售状态信息
 """
-import os
-import json
-import re
-import requests
+import queue
 import logging
-from datetime import datetime
+import threading
 from ..utils.time_utils import now_in_zone
 from collections import Counter
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Dict, List, Tuple, Optional
-from bs4 import BeautifulSoup
+from typing import Dict, Iterator, List, Tuple, Optional
 
-from ..config import get_project_config, HEADERS, COLOR_STATUS_MAP, MAX_WORKERS
-from ..utils import fetch_html, get_buildings_url
-from ..models import HouseData, BuildingData, StatusChange
+from ..config import STATUS_NAMES, OTHER_STATUS
+from ..parsers import get_parser
+from ..parsers.status_classifier import STATUS_CLASSIFIER
+from ..models import HouseData, BuildingData, StatusChange, CompactBuildingData
+from ..storage.snapshots import load_snapshot, save_snapshot, SnapshotWriter
+from ..storage.history import append_history
+from ..storage.snapshot_index import get_index
 
 logger = logging.getLogger(__name__)
 
 def parse_status(style: str) -> str:
     """解析状态样式"""
-    style = style.upper()
-    for color, status in COLOR_STATUS_MAP.items():
-        if color in style:
-            return status
-    return "其他"
-
-def extract_building_name(soup) -> str:
-    """提取楼栋名称"""
-    span = soup.find("span", string=lambda x: x and "楼盘表" in x)
-    if span:
-        return span.get_text(strip=True).replace("楼盘表", "")
-    return "未知楼栋"
-
-def process_building(bid: str, url: str) -> Optional[BuildingData]:
-    """处理单个楼栋"""
-    logger.info(f"处理楼栋 {bid}...")
-
-    try:
-        resp = requests.get(url, headers=HEADERS, timeout=30)
-        resp.raise_for_status()
-        resp.encoding = "utf-8"
-    except Exception as e:
-        logger.error(f"  ❌ 请求失败：{e}")
-        return None
-
-    soup = BeautifulSoup(resp.text, "html.parser")
-    table = soup.find("table", id="table_Buileing")
-    if not table:
-        logger.error("  ❌ 未找到 table_Buileing")
+    code = STATUS_CLASSIFIER.classify(style)
+    return STATUS_NAMES[code] if code is not None else OTHER_STATUS
+
+def parse_building_html(bid: str, html: str) -> Optional[BuildingData]:
+    """解析楼盘表页面，提取每户状态"""
+    cells = get_parser().building_cells(html)
+    if cells is None:
+        logger.error(f"  ❌ {bid} 未找到 table_Buileing")
         return None
 
     rows = []
     counter = Counter()
 
-    for div in table.find_all("div"):
-        style = div.get("style", "")
-        if "BACKGROUND" not in style.upper():
+    codes = STATUS_CLASSIFIER.classify_many(style for _, style in cells)
+    for (house_no, _), code in zip(cells, codes):
+        if code is None:
             continue
 
-        a = div.find("a")
-        if not a:
-            continue
-
-        house_no = a.get_text(strip=True)
-        status = parse_status(style)
-
+        status = STATUS_NAMES[code]
         rows.append(HouseData(
             house_no=house_no,
             status=status
@@ -81,39 +53,41 @@ def process_building(bid: str, url: str) -> Optional[BuildingData]:
         status_count=dict(counter)
     )
 
-def scrape_status_data(project: str = 'house') -> Dict[str, BuildingData]:
-    """抓取所有楼栋状态数据（按项目）"""
-    BUILDING_URLS = get_buildings_url(project=project)
-    all_buildings_data = {}
-
-    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        futures = [executor.submit(process_building, bid, url)
-                  for bid, url in BUILDING_URLS.items()]
-        for future in as_completed(futures):
-            building_data = future.result()
-            if building_data:
-                all_buildings_data[building_data.building_name] = building_data
-
-    return all_buildings_data
+def scrape_status_data(project: str = 'house', engine: str = None,
+                       cancel: Optional[threading.Event] = None) -> Dict[str, BuildingData]:
+    """抓取所有楼栋状态数据（按项目）
+    engine: 'threads' 或 'async'，默认取 config.SCRAPE_ENGINE
+    cancel: 被 set 后停止发起新请求（用于放弃预先启动的抓取）
+    """
+    from .building_scraper import scrape_buildings
+
+    pages = scrape_buildings(project=project, engine=engine, cancel=cancel)
+    return {bid: page.status for bid, page in pages.items() if page.status}
+
+def building_snapshot_dict(bdata: BuildingData) -> Dict:
+    """楼栋状态 -> 快照中的字典格式"""
+    return {
+        "building_name": bdata.building_name,
+        "house_data": [{"house_no": h.house_no, "status": h.status} for h in bdata.house_data],
+        "status_count": bdata.status_count
+    }
+
+def _append_history(project: str, date: str, data: Dict):
+    """同步写入列式状态历史（失败不影响快照文件）"""
+    try:
+        append_history(project, date, data)
+    except Exception as e:
+        logger.warning(f"⚠️ 状态历史写入失败：{e}")
 
 def save_status_data(data: Dict[str, BuildingData], date: str, project: str = 'house'):
-    """保存状态数据到文件（按项目）"""
-    cfg = get_project_config(project)
-    sales_dir = cfg.get('SALES_DIR')
-    os.makedirs(sales_dir, exist_ok=True)
-    json_path = os.path.join(sales_dir, f"{date}.json")
-
+    """保存状态数据到文件（按项目，格式见 config.SNAPSHOT_FORMAT）"""
     # 转换为字典格式
-    dict_data = {}
-    for bid, bdata in data.items():
-        dict_data[bid] = {
-            "building_name": bdata.building_name,
-            "house_data": [{"house_no": h.house_no, "status": h.status} for h in bdata.house_data],
-            "status_count": bdata.status_count
-        }
+    dict_data = {bid: building_snapshot_dict(bdata) for bid, bdata in data.items()}
 
-    with open(json_path, "w", encoding="utf-8") as f:
-        json.dump(dict_data, f, ensure_ascii=False, indent=2)
+    json_path = save_snapshot(dict_data, date, project=project)
+    get_index(project).add(date, json_path, dict_data)
+
+    _append_history(project, date, dict_data)
 
     logger.info(f"📄 已生成：{json_path}")
     return json_path
@@ -123,12 +97,10 @@ def compare_status_changes(prev_file: str, curr_file: str) -> List[StatusChange]
     changes = []
 
     # 读取前一天数据
-    with open(prev_file, 'r', encoding='utf-8') as f:
-        prev_data = json.load(f)
+    prev_data = load_snapshot(prev_file)
 
     # 读取当天数据
-    with open(curr_file, 'r', encoding='utf-8') as f:
-        curr_data = json.load(f)
+    curr_data = load_snapshot(curr_file)
 
     # 比较每个楼栋
     for building_name in curr_data:
@@ -138,6 +110,8 @@ def compare_status_changes(prev_file: str, curr_file: str) -> List[StatusChange]
 
         prev_building = prev_data[building_name]
         curr_building = curr_data[building_name]
+        if prev_building['house_data'] == curr_building['house_data']:
+            continue
 
         prev_houses = {h['house_no']: h['status'] for h in prev_building['house_data']}
         curr_houses = curr_building['house_data']
@@ -159,30 +133,131 @@ def compare_status_changes(prev_file: str, curr_file: str) -> List[StatusChange]
 
 def get_latest_json_files(project: str = 'house') -> Tuple[str, str]:
     """获取最新的两个JSON文件（按项目）"""
-    cfg = get_project_config(project)
-    sales_dir = cfg.get('SALES_DIR')
-    if not os.path.exists(sales_dir):
-        raise ValueError(f"{sales_dir} 目录不存在")
-    files = [f for f in os.listdir(sales_dir) if f.endswith('.json') and re.match(r'\d{4}-\d{2}-\d{2}\.json', f)]
-    files.sort()
-    if len(files) < 2:
+    index = get_index(project)
+    dates = index.dates()
+    if len(dates) < 2:
         raise ValueError("至少需要两个JSON文件")
-    return os.path.join(sales_dir, files[-2]), os.path.join(sales_dir, files[-1])
+    return index.snapshot_path(dates[-2]), index.snapshot_path(dates[-1])
 
-def get_status_changes(project: str = 'house') -> List[StatusChange]:
-    """获取状态变化（完整流程，按项目）"""
+def get_status_changes(project: str = 'house', engine: str = None,
+                       status_data: Dict[str, BuildingData] = None) -> List[StatusChange]:
+    """获取状态变化（完整流程，按项目）
+    status_data: 已抓取好的当天状态（例如预先并行抓取的结果），为 None 时现场抓取
+    """
     # 使用时区感知的当前日期（默认 Asia/Shanghai）
     today = now_in_zone().strftime("%Y-%m-%d")
 
     # 抓取并保存当天数据
-    status_data = scrape_status_data(project=project)
+    if status_data is None:
+        status_data = scrape_status_data(project=project, engine=engine)
     save_status_data(status_data, today, project=project)
 
-    # 比较状态变化
-    try:
-        prev_file, curr_file = get_latest_json_files(project=project)
-        changes = compare_status_changes(prev_file, curr_file)
-        return changes
-    except ValueError:
+    # 比较状态变化（通过快照索引，只展开内容有变化的楼栋）
+    index = get_index(project)
+    dates = index.dates()
+    if len(dates) < 2:
         # 如果没有足够的历史数据，返回空列表
-        return []
\ No newline at end of file
+        return []
+    return index.diff(dates[-2], dates[-1])
+
+_STREAM_DONE = object()
+
+class StatusStream:
+    """流式抓取当天状态：每完成一个楼栋，立即写入快照并与前一天的同一楼栋比较
+    迭代得到 StatusChange；迭代结束后调用 commit() 才会替换当天快照、更新索引与状态历史，
+    abort() 放弃本次写入。内存中只保留每个楼栋的紧凑状态（用于写入状态历史）
+    """
+
+    def __init__(self, project: str, date: str, engine: str = None,
+                 cancel: Optional[threading.Event] = None):
+        self.project = project
+        self.date = date
+        self.engine = engine
+        self.cancel = cancel or threading.Event()
+        self.index = get_index(project)
+        self.prev_date = self.index.previous_date(date)
+        self.writer = SnapshotWriter(date, project=project)
+        self.compact: Dict[str, CompactBuildingData] = {}
+        self.finished = False
+        self._closed = False
+
+    def _scrape(self, results: queue.Queue):
+        from .building_scraper import scrape_buildings
+        try:
+            scrape_buildings(project=self.project, engine=self.engine, cancel=self.cancel,
+                             on_result=lambda bid, page: results.put((bid, page)))
+        except BaseException as e:
+            results.put(e)
+        finally:
+            results.put(_STREAM_DONE)
+
+    def __iter__(self) -> Iterator[StatusChange]:
+        results = queue.Queue()
+        thread = threading.Thread(target=self._scrape, args=(results,), daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = results.get()
+                if item is _STREAM_DONE:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+
+                bid, page = item
+                if not page.status:
+                    continue
+                bdata = building_snapshot_dict(page.status)
+                digest = self.writer.add(bid, bdata)
+                self.compact[bid] = CompactBuildingData.from_building(page.status)
+                if self.prev_date is not None:
+                    yield from self.index.diff_building(self.prev_date, bid, bdata["house_data"], digest)
+            self.finished = not self.cancel.is_set()
+        finally:
+            if not self.finished:
+                # 提前停止迭代或出错：不再发起新请求
+                self.cancel.set()
+            thread.join()
+
+    def commit(self) -> str:
+        """写入当天快照并更新索引与状态历史，返回快照文件路径"""
+        if not self.finished:
+            raise RuntimeError("楼栋状态尚未全部抓取完成，无法保存快照")
+        path = self.writer.commit()
+        self._closed = True
+        self.index.record(self.date, path, self.writer.summaries)
+
+        _append_history(self.project, self.date, self.compact)
+
+        logger.info(f"📄 已生成：{path}")
+        return path
+
+    def abort(self):
+        """放弃本次抓取与写入（已 commit 时无操作）"""
+        if self._closed:
+            return
+        self.cancel.set()
+        self.writer.abort()
+        self._closed = True
+
+
+def stream_status_changes(project: str, date: str, engine: str = None,
+                          cancel: Optional[threading.Event] = None) -> Iterator[StatusChange]:
+    """流式获取状态变化：逐个楼栋产出变化，全部完成后保存当天快照"""
+    stream = StatusStream(project, date, engine=engine, cancel=cancel)
+    try:
+        yield from stream
+        if stream.finished:
+            stream.commit()
+    finally:
+        stream.abort()
+
+
+def collect_status_changes(project: str, date: str, engine: str = None,
+                           cancel: Optional[threading.Event] = None) -> Tuple[StatusStream, List[StatusChange]]:
+    """完整运行一次 StatusStream（不提交），返回 (stream, 全部变化)，由调用方决定 commit 或 abort"""
+    stream = StatusStream(project, date, engine=engine, cancel=cancel)
+    try:
+        return stream, list(stream)
+    except BaseException:
+        stream.abort()
+        raise
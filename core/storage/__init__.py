@@ -0,0 +1,4 @@
+"""
+存储模块
+负责状态快照、历史数据等的读写
+"""
@@ -0,0 +1,208 @@
+"""
+列式状态历史
+把每天的快照压成一个 日期 × 房屋 的 uint8 状态编码矩阵，保存在 data/{project}/sales/history/：
+- meta.json：日期列表与房屋列表（"楼栋\t房号"，按首次出现顺序编号）
+- codes.u8：按行（日期）连续存放的状态编码，MISSING 表示当天无该房屋
+查询时通过内存映射只读取需要的行或列，不会加载其他日期
+"""
+import os
+import logging
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..config import get_project_config, STATUS_CODES, STATUS_NAMES, OTHER_CODE
+from ..models import CompactBuildingData
+from ..utils.serialization import load_file, dump_file
+
+logger = logging.getLogger(__name__)
+
+# 当天不存在该房屋
+MISSING = 255
+
+META_FILE = "meta.json"
+CODES_FILE = "codes.u8"
+
+
+def house_key(building_name: str, house_no: str) -> str:
+    """房屋在历史矩阵中的唯一键"""
+    return f"{building_name}\t{house_no}"
+
+
+class StatusHistory:
+    """日期 × 房屋 状态编码矩阵"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.dates: List[str] = []
+        self.houses: List[str] = []
+        self._load_meta()
+
+    @classmethod
+    def open(cls, project: str = 'house') -> "StatusHistory":
+        return cls(get_project_config(project)["HISTORY_DIR"])
+
+    # ---------- 元数据 ----------
+
+    @property
+    def _meta_path(self) -> str:
+        return os.path.join(self.directory, META_FILE)
+
+    @property
+    def _codes_path(self) -> str:
+        return os.path.join(self.directory, CODES_FILE)
+
+    def _load_meta(self):
+        if os.path.exists(self._meta_path):
+            meta = load_file(self._meta_path)
+            self.dates = meta["dates"]
+            self.houses = meta["houses"]
+        self._index()
+
+        # 写入中途退出时 codes.u8 可能比元数据描述的多出半行，截断到一致状态
+        expected = len(self.dates) * len(self.houses)
+        if os.path.exists(self._codes_path) and os.path.getsize(self._codes_path) > expected:
+            with open(self._codes_path, "r+b") as f:
+                f.truncate(expected)
+
+    def _index(self):
+        self._date_index = {d: i for i, d in enumerate(self.dates)}
+        self._house_index = {h: i for i, h in enumerate(self.houses)}
+        self._building_columns: Dict[str, List[int]] = {}
+        for i, key in enumerate(self.houses):
+            self._building_columns.setdefault(key.split("\t", 1)[0], []).append(i)
+
+    def _save_meta(self):
+        dump_file({"dates": self.dates, "houses": self.houses}, self._meta_path, atomic=True)
+
+    # ---------- 矩阵访问 ----------
+
+    def matrix(self) -> np.ndarray:
+        """只读内存映射的完整矩阵，形状为 (日期数, 房屋数)"""
+        if not self.dates or not self.houses:
+            return np.full((len(self.dates), len(self.houses)), MISSING, dtype=np.uint8)
+        return np.memmap(self._codes_path, dtype=np.uint8, mode="r",
+                         shape=(len(self.dates), len(self.houses)))
+
+    def _encode_snapshot(self, snapshot: Dict[str, Dict]) -> Tuple[np.ndarray, List[str]]:
+        """把快照编码为一行；返回 (行, 新出现的房屋键)"""
+        new_houses = []
+        cells = []
+        for building_name, bdata in snapshot.items():
+            if isinstance(bdata, CompactBuildingData):
+                houses = zip(bdata.house_nos, bdata.codes.tolist())
+            else:
+                houses = ((h["house_no"], STATUS_CODES.get(h.get("status"), OTHER_CODE))
+                          for h in bdata.get("house_data", []))
+            for house_no, code in houses:
+                key = house_key(building_name, house_no)
+                if key not in self._house_index:
+                    self._house_index[key] = len(self.houses) + len(new_houses)
+                    new_houses.append(key)
+                cells.append((self._house_index[key], code))
+
+        row = np.full(len(self.houses) + len(new_houses), MISSING, dtype=np.uint8)
+        for col, code in cells:
+            row[col] = code
+        return row, new_houses
+
+    def upsert(self, date: str, snapshot: Dict[str, Dict]):
+        """写入某天的快照（同一天重复写入会覆盖该行）
+        snapshot 的值可以是快照中的楼栋字典，也可以是 CompactBuildingData
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        row, new_houses = self._encode_snapshot(snapshot)
+        old_width = len(self.houses)
+
+        if new_houses:
+            # 房屋列变多：整体重写并在右侧补 MISSING（只在出现新房屋时发生）
+            old = np.array(self.matrix())
+            widened = np.full((len(self.dates), old_width + len(new_houses)), MISSING, dtype=np.uint8)
+            widened[:, :old_width] = old
+            self.houses.extend(new_houses)
+            self._write_full(widened)
+
+        if date in self._date_index:
+            codes = np.memmap(self._codes_path, dtype=np.uint8, mode="r+",
+                              shape=(len(self.dates), len(self.houses)))
+            codes[self._date_index[date]] = row
+            codes.flush()
+            del codes
+        elif not self.dates or date > self.dates[-1]:
+            with open(self._codes_path, "ab") as f:
+                f.write(row.tobytes())
+            self.dates.append(date)
+        else:
+            # 补写更早的日期：在对应位置插入一行
+            pos = bisect_left(self.dates, date)
+            full = np.insert(np.array(self.matrix()), pos, row, axis=0)
+            self.dates.insert(pos, date)
+            self._write_full(full)
+
+        self._save_meta()
+        self._index()
+
+    def _write_full(self, codes: np.ndarray):
+        tmp_path = self._codes_path + ".tmp"
+        codes.astype(np.uint8).tofile(tmp_path)
+        os.replace(tmp_path, self._codes_path)
+
+    # ---------- 查询 ----------
+
+    def house_timeline(self, building_name: str, house_no: str) -> List[Tuple[str, str]]:
+        """某套房屋的状态时间线 [(日期, 状态)]，跳过当天不存在的日期"""
+        col = self._house_index.get(house_key(building_name, house_no))
+        if col is None:
+            return []
+        column = np.asarray(self.matrix()[:, col])
+        return [(self.dates[i], STATUS_NAMES[c]) for i, c in enumerate(column) if c != MISSING]
+
+    def building_state(self, building_name: str, date: str) -> Dict[str, str]:
+        """某楼栋在某天的状态 {房号: 状态}"""
+        row_idx = self._date_index.get(date)
+        cols = self._building_columns.get(building_name)
+        if row_idx is None or not cols:
+            return {}
+        row = np.asarray(self.matrix()[row_idx])
+        return {self.houses[c].split("\t", 1)[1]: STATUS_NAMES[row[c]] for c in cols if row[c] != MISSING}
+
+    def state_on(self, date: str) -> Optional[Dict[str, Dict[str, str]]]:
+        """某天全部楼栋的状态 {楼栋: {房号: 状态}}；该日期无记录时返回 None"""
+        row_idx = self._date_index.get(date)
+        if row_idx is None:
+            return None
+        row = np.asarray(self.matrix()[row_idx])
+        state: Dict[str, Dict[str, str]] = {}
+        for c in np.flatnonzero(row != MISSING):
+            building_name, house_no = self.houses[c].split("\t", 1)
+            state.setdefault(building_name, {})[house_no] = STATUS_NAMES[row[c]]
+        return state
+
+
+def append_history(project: str, date: str, snapshot: Dict[str, Dict]):
+    """把当天快照写入项目的状态历史；历史尚不存在时先由已有快照整体生成"""
+    history = StatusHistory.open(project)
+    if not history.dates:
+        history = migrate_history(project)
+    history.upsert(date, snapshot)
+
+
+def migrate_history(project: str = 'house') -> StatusHistory:
+    """把已有的每日快照目录整体转换为状态历史（会重建 history 目录）"""
+    from .snapshots import list_snapshots, load_snapshot
+
+    history_dir = get_project_config(project)["HISTORY_DIR"]
+    for name in (META_FILE, CODES_FILE):
+        path = os.path.join(history_dir, name)
+        if os.path.exists(path):
+            os.remove(path)
+
+    history = StatusHistory(history_dir)
+    snapshots = list_snapshots(project)
+    for date, path in snapshots:
+        history.upsert(date, load_snapshot(path))
+
+    logger.info(f"✅ 已转换 {len(snapshots)} 个快照 -> {history_dir}"
+                f"（{len(history.dates)} 天 × {len(history.houses)} 户）")
+    return history
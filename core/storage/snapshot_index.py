@@ -0,0 +1,213 @@
+"""
+快照索引
+为每个项目维护 data/{project}/sales/index.json：
+{日期: {"file": 文件名, "mtime": 修改时间, "buildings": {楼栋: {"hash": 内容哈希, "status_count": {...}}}}}
+- 哈希与 cas 格式的 blob 哈希一致，两种快照格式可以直接比较
+- 目录修改时间未变时不重新扫描目录
+- diff 只展开内容哈希不同的楼栋，计算结果按快照版本缓存
+"""
+import os
+import logging
+import threading
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from ..config import get_project_config
+from ..models import StatusChange
+from ..utils.serialization import load_file, dump_file
+from .snapshots import list_snapshots, load_snapshot, load_blob, encode_blob, MANIFEST_SUFFIX
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "index.json"
+INDEX_VERSION = 1
+
+
+def _summarize(snapshot: Dict[str, Dict]) -> Dict[str, Dict]:
+    """计算快照中每个楼栋的内容哈希与状态统计"""
+    return {
+        building_name: {"hash": encode_blob(bdata)[0], "status_count": bdata.get("status_count")}
+        for building_name, bdata in snapshot.items()
+    }
+
+
+@lru_cache(maxsize=4)
+def _load_json_snapshot(path: str, mtime: float) -> Dict[str, Dict]:
+    """读取旧格式整份快照（按修改时间缓存，同一文件只解析一次）"""
+    return load_snapshot(path)
+
+
+class SnapshotIndex:
+    """单个项目的快照索引"""
+
+    def __init__(self, project: str = 'house'):
+        self.project = project
+        self.sales_dir = get_project_config(project)["SALES_DIR"]
+        self.path = os.path.join(self.sales_dir, INDEX_FILE)
+        self.entries: Dict[str, Dict] = {}
+        self._dir_mtime: Optional[float] = None
+        self._diff_cache: Dict[Tuple, List[StatusChange]] = {}
+        self._lock = threading.RLock()
+        self._load()
+
+    # ---------- 持久化 ----------
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            data = load_file(self.path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ 快照索引无法读取，将重建：{e}")
+            return
+        if data.get("version") != INDEX_VERSION:
+            return
+        self.entries = data.get("snapshots", {})
+        self._dir_mtime = data.get("dir_mtime")
+
+    def _save(self):
+        self._dir_mtime = os.stat(self.sales_dir).st_mtime
+        data = {"version": INDEX_VERSION, "dir_mtime": self._dir_mtime,
+                "snapshots": dict(sorted(self.entries.items()))}
+        dump_file(data, self.path, atomic=True)
+        # 写索引本身会改变目录修改时间，写完后再记录一次
+        self._dir_mtime = os.stat(self.sales_dir).st_mtime
+
+    # ---------- 维护 ----------
+
+    def refresh(self, force: bool = False):
+        """与快照目录同步；目录修改时间未变时直接返回"""
+        with self._lock:
+            if not os.path.exists(self.sales_dir):
+                return
+            if not force and self._dir_mtime == os.stat(self.sales_dir).st_mtime:
+                return
+
+            current = dict(list_snapshots(self.project))
+            changed = False
+            for date in list(self.entries):
+                if date not in current:
+                    del self.entries[date]
+                    changed = True
+
+            for date, path in current.items():
+                mtime = os.path.getmtime(path)
+                entry = self.entries.get(date)
+                if entry and entry["file"] == os.path.basename(path) and entry["mtime"] == mtime:
+                    continue
+                self.entries[date] = self._build_entry(path, mtime)
+                changed = True
+
+            if changed or self._dir_mtime is None:
+                self._save()
+            else:
+                self._dir_mtime = os.stat(self.sales_dir).st_mtime
+
+    def _build_entry(self, path: str, mtime: float, snapshot: Dict[str, Dict] = None) -> Dict:
+        if snapshot is None and path.endswith(MANIFEST_SUFFIX):
+            # manifest 已经包含哈希，只需读取 blob 里的状态统计
+            manifest = load_file(path)
+            buildings = {
+                name: {"hash": digest, "status_count": load_blob(self.sales_dir, digest)["status_count"]}
+                for name, digest in manifest["buildings"].items()
+            }
+        else:
+            buildings = _summarize(snapshot if snapshot is not None else load_snapshot(path))
+        return {"file": os.path.basename(path), "mtime": mtime, "buildings": buildings}
+
+    def add(self, date: str, path: str, snapshot: Dict[str, Dict]):
+        """记录刚保存的快照（无需重新读取文件）"""
+        self.record(date, path, _summarize(snapshot))
+
+    def record(self, date: str, path: str, buildings: Dict[str, Dict]):
+        """按已算好的楼栋摘要 {楼栋: {"hash", "status_count"}} 记录快照（例如 SnapshotWriter.summaries）"""
+        with self._lock:
+            self.refresh()
+            self.entries[date] = {"file": os.path.basename(path), "mtime": os.path.getmtime(path),
+                                  "buildings": buildings}
+            self._save()
+
+    # ---------- 查询 ----------
+
+    def dates(self) -> List[str]:
+        """所有快照日期（升序）"""
+        self.refresh()
+        return sorted(self.entries)
+
+    def previous_date(self, date: str) -> Optional[str]:
+        """除 date 以外最新的快照日期（即 date 当天要对比的前一天）"""
+        dates = [d for d in self.dates() if d != date]
+        return dates[-1] if dates else None
+
+    def snapshot_path(self, date: str) -> str:
+        return os.path.join(self.sales_dir, self.entries[date]["file"])
+
+    def house_data(self, date: str, building_name: str) -> List[Dict]:
+        """展开某天某楼栋的 house_data 列表"""
+        entry = self.entries[date]
+        if entry["file"].endswith(MANIFEST_SUFFIX):
+            return load_blob(self.sales_dir, entry["buildings"][building_name]["hash"])["house_data"]
+        return _load_json_snapshot(self.snapshot_path(date), entry["mtime"])[building_name]["house_data"]
+
+    def diff(self, date_a: str, date_b: str) -> List[StatusChange]:
+        """比较两个日期的快照，返回 date_b 相对 date_a 的状态变化（与 compare_status_changes 结果一致）"""
+        self.refresh()
+        if date_a not in self.entries or date_b not in self.entries:
+            raise ValueError(f"快照不存在: {date_a} / {date_b}")
+
+        entry_a, entry_b = self.entries[date_a], self.entries[date_b]
+        cache_key = (date_a, entry_a["mtime"], date_b, entry_b["mtime"])
+        if cache_key in self._diff_cache:
+            return list(self._diff_cache[cache_key])
+
+        changes = []
+        for building_name, info_b in entry_b["buildings"].items():
+            if building_name in entry_a["buildings"] and entry_a["buildings"][building_name]["hash"] == info_b["hash"]:
+                continue
+            changes.extend(self.diff_building(date_a, building_name, self.house_data(date_b, building_name)))
+
+        self._diff_cache[cache_key] = changes
+        return list(changes)
+
+    def diff_building(self, prev_date: str, building_name: str, house_data: List[Dict],
+                      digest: str = None) -> List[StatusChange]:
+        """比较单个楼栋（当前的 house_data 列表）相对 prev_date 的状态变化
+        digest: 当前内容哈希，与 prev_date 相同时直接返回空列表
+        """
+        info_prev = self.entries[prev_date]["buildings"].get(building_name)
+        if info_prev is None:
+            logger.warning(f"跳过 {building_name}：前一天数据不存在")
+            return []
+        if digest is not None and info_prev["hash"] == digest:
+            return []
+
+        prev_houses = {h["house_no"]: h["status"] for h in self.house_data(prev_date, building_name)}
+        changes = []
+        for house in house_data:
+            house_no, curr_status = house["house_no"], house["status"]
+            prev_status = prev_houses.get(house_no, '不存在')
+            if curr_status != prev_status:
+                changes.append(StatusChange(
+                    building_name=building_name,
+                    house_no=house_no,
+                    prev_status=prev_status,
+                    curr_status=curr_status
+                ))
+        return changes
+
+
+_indexes: Dict[str, SnapshotIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(project: str = 'house') -> SnapshotIndex:
+    """获取项目的快照索引（进程内单例）"""
+    with _indexes_lock:
+        if project not in _indexes:
+            _indexes[project] = SnapshotIndex(project)
+        return _indexes[project]
+
+
+def diff(project: str, date_a: str, date_b: str) -> List[StatusChange]:
+    """任意两个日期之间的状态变化"""
+    return get_index(project).diff(date_a, date_b)
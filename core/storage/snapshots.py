@@ -0,0 +1,304 @@
+"""
+状态快照读写
+快照按日期保存在 data/{project}/sales/ 下，支持三种格式：
+- json：YYYY-MM-DD.json，整份快照一个文件（旧格式）
+- cas：内容寻址存储。每个楼栋的数据按内容哈希存为 blobs/<hash>.json，只存一次；
+       YYYY-MM-DD.manifest.json 只记录 {楼栋名: 哈希}
+- ndjson：YYYY-MM-DD.ndjson，每行一个楼栋，可在抓取过程中逐个追加（见 SnapshotWriter）
+均可按 config.SNAPSHOT_COMPRESSION 压缩（gzip -> .gz，zstd -> .zst，紧凑分隔符），
+json 格式压缩整份快照，cas 格式压缩每个 blob，ndjson 格式逐行压缩；读取时按扩展名自动识别
+读取时统一还原为原有的字典结构：
+{楼栋名: {"building_name": ..., "house_data": [{"house_no": ..., "status": ...}], "status_count": {...}}}
+"""
+import os
+import re
+import gzip
+import hashlib
+import logging
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from ..config import get_project_config, SNAPSHOT_FORMAT, SNAPSHOT_COMPRESSION
+from ..models import CompactBuildingData
+from ..utils.serialization import decode, dumps, dump_file
+
+try:
+    import zstandard
+    HAS_ZSTD = True
+except ImportError:
+    zstandard = None
+    HAS_ZSTD = False
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMATS = ("json", "cas", "ndjson")
+
+# 压缩方式 -> 文件扩展名
+COMPRESSIONS = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+
+SNAPSHOT_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})(\.manifest\.json|\.json|\.ndjson)(\.gz|\.zst)?$")
+MANIFEST_SUFFIX = ".manifest.json"
+BLOBS_DIR = "blobs"
+
+
+def resolve_compression(compression: str = None) -> str:
+    """确定实际使用的压缩方式（zstandard 未安装时 zstd 退回 gzip）"""
+    compression = compression or SNAPSHOT_COMPRESSION
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"未知的压缩方式: {compression}")
+    if compression == "zstd" and not HAS_ZSTD:
+        logger.warning("⚠️ 未安装 zstandard，改用 gzip 压缩")
+        return "gzip"
+    return compression
+
+
+def compress(content: bytes, compression: str) -> bytes:
+    if compression == "gzip":
+        return gzip.compress(content, mtime=0)
+    if compression == "zstd":
+        return zstandard.ZstdCompressor(level=10).compress(content)
+    return content
+
+
+def read_bytes(path: str) -> bytes:
+    """读取文件内容，按扩展名自动解压"""
+    with open(path, "rb") as f:
+        content = f.read()
+    if path.endswith(".gz"):
+        return gzip.decompress(content)
+    if path.endswith(".zst"):
+        if not HAS_ZSTD:
+            raise RuntimeError(f"读取 {path} 需要安装 zstandard")
+        # ndjson 快照由多个独立压缩帧拼接而成
+        with zstandard.ZstdDecompressor().stream_reader(content, read_across_frames=True) as reader:
+            return reader.read()
+    return content
+
+
+def _write_atomic(path: str, content: bytes):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def _sales_dir(project: str) -> str:
+    return get_project_config(project).get('SALES_DIR')
+
+
+def list_snapshots(project: str = 'house') -> List[Tuple[str, str]]:
+    """列出项目的所有快照，返回按日期升序的 [(日期, 文件路径)]"""
+    sales_dir = _sales_dir(project)
+    if not os.path.exists(sales_dir):
+        raise ValueError(f"{sales_dir} 目录不存在")
+
+    snapshots = {}
+    for name in os.listdir(sales_dir):
+        m = SNAPSHOT_RE.match(name)
+        if m:
+            # 同一天同时存在两种格式时以 manifest 为准
+            if m.group(1) not in snapshots or name.endswith(MANIFEST_SUFFIX):
+                snapshots[m.group(1)] = os.path.join(sales_dir, name)
+    return sorted(snapshots.items())
+
+
+# ---------- 内容寻址 blob ----------
+
+def encode_blob(bdata: Dict) -> Tuple[str, bytes]:
+    """把一个楼栋的数据编码为 blob，返回 (哈希, 内容)"""
+    payload = {
+        "house_data": bdata.get("house_data", []),
+        "status_count": bdata.get("status_count"),
+    }
+    content = dumps(payload)
+    return hashlib.sha256(content).hexdigest(), content
+
+
+def blob_path(sales_dir: str, digest: str, compression: str = "none") -> str:
+    return os.path.join(sales_dir, BLOBS_DIR, f"{digest}.json{COMPRESSIONS[compression]}")
+
+
+@lru_cache(maxsize=4096)
+def load_blob(sales_dir: str, digest: str) -> Dict:
+    """读取 blob（内容不可变，可放心缓存；压缩与否均可）"""
+    for compression in COMPRESSIONS:
+        path = blob_path(sales_dir, digest, compression)
+        if os.path.exists(path):
+            return decode(read_bytes(path))
+    raise FileNotFoundError(blob_path(sales_dir, digest))
+
+
+def _write_blob(sales_dir: str, digest: str, content: bytes, compression: str = "none") -> Optional[str]:
+    """写入 blob，返回新建的文件路径；已存在（任一压缩方式）时不写入，返回 None"""
+    if any(os.path.exists(blob_path(sales_dir, digest, c)) for c in COMPRESSIONS):
+        return None
+    path = blob_path(sales_dir, digest, compression)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    _write_atomic(path, compress(content, compression))
+    return path
+
+
+# ---------- 读写 ----------
+
+def _is_ndjson(path: str) -> bool:
+    return SNAPSHOT_RE.match(os.path.basename(path)).group(2) == ".ndjson"
+
+
+def load_snapshot(path: str) -> Dict[str, Dict]:
+    """读取快照文件为字典结构（自动识别格式与压缩）"""
+    content = read_bytes(path)
+    if _is_ndjson(path):
+        snapshot = {}
+        for line in content.splitlines():
+            if line:
+                bdata = decode(line)
+                snapshot[bdata["building_name"]] = bdata
+        return snapshot
+
+    data = decode(content)
+    if not path.endswith(MANIFEST_SUFFIX):
+        return data
+
+    sales_dir = os.path.dirname(path)
+    snapshot = {}
+    for building_name, digest in data["buildings"].items():
+        blob = load_blob(sales_dir, digest)
+        snapshot[building_name] = {
+            "building_name": building_name,
+            "house_data": blob["house_data"],
+            "status_count": blob["status_count"],
+        }
+    return snapshot
+
+
+@lru_cache(maxsize=4096)
+def _compact_blob(sales_dir: str, digest: str, building_name: str) -> CompactBuildingData:
+    return CompactBuildingData.from_houses(building_name, load_blob(sales_dir, digest)["house_data"])
+
+
+def load_snapshot_compact(path: str) -> Dict[str, CompactBuildingData]:
+    """读取快照为紧凑结构 {楼栋名: CompactBuildingData}，适合同时保留大量快照
+    cas 格式下内容相同的楼栋在不同日期之间共用同一对象
+    """
+    if not path.endswith(MANIFEST_SUFFIX):
+        return {name: CompactBuildingData.from_building(bdata) for name, bdata in load_snapshot(path).items()}
+
+    manifest = decode(read_bytes(path))
+    sales_dir = os.path.dirname(path)
+    return {name: _compact_blob(sales_dir, digest, name) for name, digest in manifest["buildings"].items()}
+
+
+class SnapshotWriter:
+    """逐个楼栋写入当天快照
+    add() 每得到一个楼栋即写出（ndjson 追加一行，cas 写入 blob；json 格式只能在 commit 时整体写出），
+    commit() 后才原子替换当天的快照文件并删除同一天的其他格式文件；
+    abort() 放弃写入，并删除本次新建的 blob（未被任何 manifest 引用）
+    summaries 记录已写入楼栋的 {楼栋名: {"hash", "status_count"}}，可直接用于快照索引
+    """
+
+    def __init__(self, date: str, project: str = 'house', fmt: str = None, compression: str = None):
+        self.fmt = fmt or SNAPSHOT_FORMAT
+        if self.fmt not in SNAPSHOT_FORMATS:
+            raise ValueError(f"未知的快照格式: {self.fmt}")
+        self.compression = resolve_compression(compression)
+        self.date = date
+        self.sales_dir = _sales_dir(project)
+        os.makedirs(self.sales_dir, exist_ok=True)
+
+        ext = COMPRESSIONS[self.compression]
+        self.summaries: Dict[str, Dict] = {}
+        self._buildings: Dict[str, object] = {}
+        self._new_blobs: List[str] = []
+        self._file = None
+        if self.fmt == "json":
+            self.path = os.path.join(self.sales_dir, f"{date}.json{ext}")
+        elif self.fmt == "ndjson":
+            self.path = os.path.join(self.sales_dir, f"{date}.ndjson{ext}")
+            self._file = open(self.path + ".tmp", "wb")
+        else:
+            self.path = os.path.join(self.sales_dir, f"{date}{MANIFEST_SUFFIX}")
+
+    def add(self, building_name: str, bdata: Dict) -> str:
+        """写入一个楼栋，返回其内容哈希"""
+        digest, content = encode_blob(bdata)
+        self.summaries[building_name] = {"hash": digest, "status_count": bdata.get("status_count")}
+        if self.fmt == "json":
+            self._buildings[building_name] = bdata
+        elif self.fmt == "ndjson":
+            self._file.write(compress(dumps(bdata) + b"\n", self.compression))
+            self._file.flush()
+        else:
+            path = _write_blob(self.sales_dir, digest, content, self.compression)
+            if path is not None:
+                self._new_blobs.append(path)
+            self._buildings[building_name] = digest
+        return digest
+
+    def commit(self) -> str:
+        """完成写入，返回快照文件路径"""
+        if self.fmt == "json":
+            content = dumps(self._buildings, indent=2 if self.compression == "none" else None)
+            _write_atomic(self.path, compress(content, self.compression))
+        elif self.fmt == "ndjson":
+            self._file.close()
+            os.replace(self.path + ".tmp", self.path)
+        else:
+            dump_file({"date": self.date, "buildings": self._buildings}, self.path, indent=2, atomic=True)
+            self._new_blobs.clear()
+
+        for name in os.listdir(self.sales_dir):
+            m = SNAPSHOT_RE.match(name)
+            stale = os.path.join(self.sales_dir, name)
+            if m and m.group(1) == self.date and stale != self.path:
+                os.remove(stale)
+        return self.path
+
+    def abort(self):
+        """放弃写入：删除临时文件与本次新建的 blob"""
+        if self._file is not None and not self._file.closed:
+            self._file.close()
+            os.remove(self.path + ".tmp")
+        for path in self._new_blobs:
+            if os.path.exists(path):
+                os.remove(path)
+        self._new_blobs.clear()
+        self._buildings.clear()
+
+
+def save_snapshot(snapshot: Dict[str, Dict], date: str, project: str = 'house', fmt: str = None,
+                  compression: str = None) -> str:
+    """按指定格式与压缩方式保存快照（默认取 config.SNAPSHOT_FORMAT / SNAPSHOT_COMPRESSION），返回快照文件路径
+    同一天的其他格式文件会被删除，保证每天只有一份快照
+    """
+    writer = SnapshotWriter(date, project=project, fmt=fmt, compression=compression)
+    try:
+        for building_name, bdata in snapshot.items():
+            writer.add(building_name, bdata)
+    except BaseException:
+        writer.abort()
+        raise
+    return writer.commit()
+
+
+def convert_snapshots(project: str = 'house', fmt: str = "cas", compression: str = None) -> int:
+    """把项目的全部历史快照转换为指定格式与压缩方式，返回转换的快照数
+    cas 格式下已存在的 blob 也会按新的压缩方式重写
+    """
+    compression = resolve_compression(compression)
+    snapshots = list_snapshots(project)
+    sales_dir = _sales_dir(project)
+    blobs_dir = os.path.join(sales_dir, BLOBS_DIR)
+
+    if fmt == "cas" and os.path.isdir(blobs_dir):
+        for name in os.listdir(blobs_dir):
+            path = os.path.join(blobs_dir, name)
+            target = blob_path(sales_dir, name.split(".", 1)[0], compression)
+            if name.endswith(".tmp") or path == target:
+                continue
+            _write_atomic(target, compress(read_bytes(path), compression))
+            os.remove(path)
+
+    for date, path in snapshots:
+        save_snapshot(load_snapshot(path), date, project=project, fmt=fmt, compression=compression)
+    logger.info(f"✅ 已将 {len(snapshots)} 个快照转换为 {fmt} 格式（压缩：{compression}）：{sales_dir}")
+    return len(snapshots)
@@ -0,0 +1,213 @@
+"""
+汇总数据（total.json）存储
+支持两种后端（config.TOTAL_BACKEND）：
+- json：data/{project}/total.json，每次整体读写（默认）
+- sqlite：data/{project}/total.db，按天单行 upsert，按日期范围查询
+  - daily_stats：每天一行汇总数据（主键 date）
+  - deals：每条成交户号一行（主键 date + seq，按 building_name 建索引）
+sqlite 数据库不存在时自动从 total.json 导入；export_json 可导出与原格式逐字节一致的 total.json
+"""
+import os
+import sqlite3
+import logging
+from contextlib import closing
+from typing import Dict, List, Optional
+
+from ..config import get_project_config, TOTAL_BACKEND
+from ..utils.serialization import load_file, dump_file
+
+logger = logging.getLogger(__name__)
+
+TOTAL_BACKENDS = ("json", "sqlite")
+if TOTAL_BACKEND not in TOTAL_BACKENDS:
+    # 拼写错误（如 sqllite）不能静默回退到 json 后端
+    raise ValueError(f"未知的汇总数据存储后端: {TOTAL_BACKEND}（可选 {'|'.join(TOTAL_BACKENDS)}）")
+
+# total.json 中的字段 -> daily_stats 列（顺序即记录的键顺序）
+STAT_COLUMNS = [
+    ("日期", "date"),
+    ("已签约套数", "signed_units"),
+    ("已签约面积(M2)", "signed_area"),
+    ("成交均价(￥/M2)", "avg_price"),
+    ("面积(M2)", "delta_area"),
+    ("总价(￥)", "delta_total"),
+    ("均价(￥/M2)", "delta_unit"),
+]
+DEALS_KEY = "成交户号"
+DEAL_COLUMNS = ["building_name", "house_no", "area"]
+
+# 数值列不声明类型：原样保存 int / float / ""，导出时与 total.json 完全一致
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS daily_stats (
+    date TEXT PRIMARY KEY,
+    signed_units, signed_area, avg_price,
+    delta_area, delta_total, delta_unit
+);
+CREATE TABLE IF NOT EXISTS deals (
+    date TEXT NOT NULL REFERENCES daily_stats(date) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    building_name TEXT NOT NULL,
+    house_no TEXT NOT NULL,
+    area,
+    PRIMARY KEY (date, seq)
+);
+CREATE INDEX IF NOT EXISTS idx_deals_building ON deals(building_name, date);
+"""
+
+
+# ---------- json 后端 ----------
+
+def read_json_as_dict(json_file: str) -> Dict[str, Dict]:
+    """以日期为 key 读取 JSON 文件（按日期索引）"""
+    if not os.path.exists(json_file):
+        return {}
+
+    return {item["日期"]: item for item in load_file(json_file)}
+
+
+def write_json(data_by_date: Dict[str, Dict], json_file: str):
+    """写入 JSON 文件（按日期排序）"""
+    data_list = [data_by_date[d] for d in sorted(data_by_date.keys())]
+    os.makedirs(os.path.dirname(json_file), exist_ok=True)
+    dump_file(data_list, json_file, indent=4)
+
+
+# ---------- sqlite 后端 ----------
+
+def connect(project: str = 'house') -> sqlite3.Connection:
+    """打开项目的 sqlite 数据库；首次使用时由 total.json 导入"""
+    cfg = get_project_config(project)
+    db_file = cfg["TOTAL_DB"]
+    is_new = not os.path.exists(db_file)
+    os.makedirs(os.path.dirname(db_file), exist_ok=True)
+
+    conn = sqlite3.connect(db_file)
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.executescript(SCHEMA)
+    if is_new and os.path.exists(cfg["TOTAL_FILE"]):
+        records = read_json_as_dict(cfg["TOTAL_FILE"]).values()
+        with conn:
+            for record in records:
+                _upsert(conn, record)
+        logger.info(f"📥 已从 {cfg['TOTAL_FILE']} 导入 {len(records)} 条记录 -> {db_file}")
+    return conn
+
+
+def _upsert(conn: sqlite3.Connection, record: Dict):
+    columns = [col for _, col in STAT_COLUMNS]
+    conn.execute(
+        f"INSERT OR REPLACE INTO daily_stats ({', '.join(columns)}) "
+        f"VALUES ({', '.join('?' * len(columns))})",
+        [record[key] for key, _ in STAT_COLUMNS],
+    )
+    conn.execute("DELETE FROM deals WHERE date = ?", (record["日期"],))
+    conn.executemany(
+        "INSERT INTO deals (date, seq, building_name, house_no, area) VALUES (?, ?, ?, ?, ?)",
+        [(record["日期"], seq, d["building_name"], d["house_no"], d["area"])
+         for seq, d in enumerate(record[DEALS_KEY])],
+    )
+
+
+def _record_from_row(row: tuple, deals: List[Dict]) -> Dict:
+    record = {}
+    for (key, _), value in zip(STAT_COLUMNS[:4], row[:4]):
+        record[key] = value
+    record[DEALS_KEY] = deals
+    for (key, _), value in zip(STAT_COLUMNS[4:], row[4:]):
+        record[key] = value
+    return record
+
+
+def query_records(conn: sqlite3.Connection, start: Optional[str] = None,
+                  end: Optional[str] = None) -> List[Dict]:
+    """按日期范围查询记录（按日期升序，结构与 total.json 中的记录一致）"""
+    where, params = [], []
+    if start:
+        where.append("date >= ?")
+        params.append(start)
+    if end:
+        where.append("date <= ?")
+        params.append(end)
+    clause = f" WHERE {' AND '.join(where)}" if where else ""
+
+    deals_by_date: Dict[str, List[Dict]] = {}
+    for date, *values in conn.execute(
+            f"SELECT date, {', '.join(DEAL_COLUMNS)} FROM deals{clause} ORDER BY date, seq", params):
+        deals_by_date.setdefault(date, []).append(dict(zip(DEAL_COLUMNS, values)))
+
+    columns = ", ".join(col for _, col in STAT_COLUMNS)
+    rows = conn.execute(f"SELECT {columns} FROM daily_stats{clause} ORDER BY date", params)
+    return [_record_from_row(row, deals_by_date.get(row[0], [])) for row in rows]
+
+
+def export_json(project: str = 'house', json_file: str = None) -> str:
+    """把 sqlite 中的数据导出为 total.json（格式与 write_json 一致），返回文件路径"""
+    json_file = json_file or get_project_config(project)["TOTAL_FILE"]
+    with closing(connect(project)) as conn:
+        records = query_records(conn)
+    write_json({r["日期"]: r for r in records}, json_file)
+    logger.info(f"📤 已导出 {len(records)} 条记录 -> {json_file}")
+    return json_file
+
+
+# ---------- 统一接口 ----------
+
+def load_base_record(project: str, today: str) -> Optional[Dict]:
+    """当天之外最新的一条记录（计算当天增量的基准；没有其他记录时返回 None）"""
+    if TOTAL_BACKEND == "sqlite":
+        with closing(connect(project)) as conn:
+            row = conn.execute(
+                "SELECT date FROM daily_stats WHERE date != ? ORDER BY date DESC LIMIT 1", (today,)
+            ).fetchone()
+            return query_records(conn, row[0], row[0])[0] if row else None
+
+    data_by_date = read_json_as_dict(get_project_config(project)["TOTAL_FILE"])
+    dates = sorted(d for d in data_by_date if d != today)
+    return data_by_date[dates[-1]] if dates else None
+
+
+def save_record(project: str, record: Dict):
+    """写入（或覆盖）一天的记录"""
+    if TOTAL_BACKEND == "sqlite":
+        with closing(connect(project)) as conn, conn:
+            _upsert(conn, record)
+        return
+
+    total_file = get_project_config(project)["TOTAL_FILE"]
+    data_by_date = read_json_as_dict(total_file)
+    data_by_date[record["日期"]] = record
+    write_json(data_by_date, total_file)
+
+
+def data_version(project: str) -> Optional[str]:
+    """当前后端数据文件的版本标识（mtime + 大小），文件不存在时返回 None
+    数据写入后版本随之变化，可作为看板等读取方的缓存 key
+    """
+    cfg = get_project_config(project)
+    path = cfg["TOTAL_DB"] if TOTAL_BACKEND == "sqlite" else cfg["TOTAL_FILE"]
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return f"{TOTAL_BACKEND}:{stat.st_mtime_ns}:{stat.st_size}"
+
+
+def load_total(project: str, start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, Dict]:
+    """读取项目的汇总数据 {日期: 记录}（可按日期范围）"""
+    if TOTAL_BACKEND == "sqlite":
+        with closing(connect(project)) as conn:
+            return {r["日期"]: r for r in query_records(conn, start, end)}
+
+    data_by_date = read_json_as_dict(get_project_config(project)["TOTAL_FILE"])
+    return {d: r for d, r in data_by_date.items() if (not start or d >= start) and (not end or d <= end)}
+
+
+def save_total(project: str, data_by_date: Dict[str, Dict]):
+    """整体写入项目的汇总数据（sqlite 后端下逐条 upsert）"""
+    if TOTAL_BACKEND == "sqlite":
+        with closing(connect(project)) as conn, conn:
+            for record in data_by_date.values():
+                _upsert(conn, record)
+        return
+
+    write_json(data_by_date, get_project_config(project)["TOTAL_FILE"])
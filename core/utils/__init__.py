@@ -2,23 +2,19 @@
 工具函数模块
 包含通用工具函数
 """
-import requests
-from bs4 import BeautifulSoup
 from urllib.parse import urljoin
-import time
 import logging
 from typing import Dict, Optional
-from ..config import HEADERS, get_project_config, REQUEST_TIMEOUT
+from ..config import get_project_config, REQUEST_TIMEOUT
+from .http import fetch_text
+from ..parsers import get_parser
 
 logger = logging.getLogger(__name__)
 
 def fetch_html(url: str, timeout: int = REQUEST_TIMEOUT) -> str:
     """获取网页HTML内容"""
     try:
-        resp = requests.get(url, headers=HEADERS, timeout=timeout)
-        resp.raise_for_status()
-        resp.encoding = resp.apparent_encoding
-        return resp.text
+        return fetch_text(url, timeout=timeout)
     except Exception as e:
         logger.error(f"请求失败 {url}: {e}")
         raise
@@ -32,7 +28,6 @@ def get_buildings_url(project: str = 'house') -> Dict[str, str]:
     base_url = cfg.get('BASE_URL')
 
     html = fetch_html(target_url)
-    soup = BeautifulSoup(html, "html.parser")
 
     buildings = {}
     if project == 'warehouse' or project == 'house':
@@ -40,10 +35,7 @@ def get_buildings_url(project: str = 'house') -> Dict[str, str]:
     elif project == 'parking':
         na = f"地下车库"
 
-    for a in soup.find_all("a", href=True):
-        href = a["href"]
-        name = a.get_text(strip=True)
-
+    for href, name in get_parser().anchors(html):
         # 只筛选"楼栋链接"（保留原有筛选逻辑，如需支持仓储项目请根据需要调整条件）
         if (
             "pageId=320833" in href
@@ -56,7 +48,3 @@ def get_buildings_url(project: str = 'house') -> Dict[str, str]:
             buildings[name] = full_url
 
     return buildings
-
-def safe_delay(seconds: float = 0.3):
-    """安全延迟"""
-    time.sleep(seconds)
\ No newline at end of file
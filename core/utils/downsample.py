@@ -0,0 +1,39 @@
+"""
+时间序列降采样
+LTTB（Largest-Triangle-Three-Buckets）：在保留曲线形状（峰谷）的前提下把点数降到阈值以内，
+用于长历史的走势图渲染
+"""
+import numpy as np
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """返回 LTTB 选中的点的下标（升序，包含首尾两点）
+    x: 单调递增的数值（日期可先转换为整数时间戳）
+    threshold: 目标点数；点数不超过阈值或阈值小于 3 时返回全部下标
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # 首尾两点固定，中间的点平均分为 threshold - 2 个桶
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # 下一个桶的平均点（最后一个桶之后为终点）
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+            avg_x, avg_y = x[next_start:next_end].mean(), y[next_start:next_end].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+
+        # 选出与上一个选中点、下一个桶平均点构成三角形面积最大的点
+        areas = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(areas.argmax())
+        selected[i + 1] = a
+    return selected
@@ -0,0 +1,165 @@
+"""
+HTTP 抓取工具
+- 全进程共享一个带连接池的 requests.Session（keep-alive，池大小与 AIMD 并发上限 ADAPTIVE_MAX_CONCURRENCY 对齐）
+- 默认协商 gzip/deflate 压缩
+- 所有请求经过全局令牌桶限速与 AIMD 自适应并发控制（见 rate_limit）
+- 可选的运行级 URL 缓存（shared_fetch_cache）：多个项目共用同一页面时只下载一次
+- 快速确定页面编码：优先使用响应头 charset，其次只检查页面头部的 <meta charset>，
+  避免 resp.apparent_encoding 对整页做字符集探测
+"""
+import re
+import threading
+import logging
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from ..config import HEADERS, ADAPTIVE_MAX_CONCURRENCY, REQUEST_TIMEOUT
+from .rate_limit import RATE_LIMITER, CONCURRENCY, is_overload_status
+
+logger = logging.getLogger(__name__)
+
+# 目标站点页面均为 UTF-8，未声明编码时按此解码
+DEFAULT_ENCODING = "utf-8"
+
+# 只在页面开头这么多字节内查找 <meta charset>
+_META_SNIFF_BYTES = 2048
+_META_CHARSET_RE = re.compile(rb"""<meta[^>]+charset=["']?([A-Za-z0-9_\-]+)""", re.I)
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+# 运行级 URL 缓存：(url, encoding) -> Future[str]；为 None 表示未启用
+_fetch_cache: Optional[Dict[Tuple[str, Optional[str]], Future]] = None
+_fetch_cache_lock = threading.Lock()
+
+
+def _build_session(pool_size: int) -> requests.Session:
+    """创建带连接池的 Session"""
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    session.headers["Accept-Encoding"] = "gzip, deflate"
+    session.headers["Connection"] = "keep-alive"
+
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """获取全局共享的 Session（惰性创建，线程安全）"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                # 在途请求数受 CONCURRENCY 限制，不会超过 AIMD 上限；池按上限分配，连接都能回池复用
+                _session = _build_session(ADAPTIVE_MAX_CONCURRENCY)
+    return _session
+
+
+def close_session():
+    """关闭全局 Session，释放连接池"""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def detect_encoding(resp: requests.Response) -> str:
+    """快速确定响应编码（不做整页字符集探测）"""
+    content_type = resp.headers.get("Content-Type", "")
+    if "charset=" in content_type.lower():
+        charset = content_type.lower().split("charset=", 1)[1].split(";", 1)[0].strip(" \"'")
+        if charset:
+            return charset
+
+    m = _META_CHARSET_RE.search(resp.content[:_META_SNIFF_BYTES])
+    if m:
+        return m.group(1).decode("ascii", "ignore")
+
+    return DEFAULT_ENCODING
+
+
+def _fetch_text_uncached(url: str, timeout: float, encoding: Optional[str]) -> str:
+    RATE_LIMITER.acquire()
+    CONCURRENCY.acquire()
+    success = False
+    try:
+        resp = get_session().get(url, timeout=timeout)
+        success = not is_overload_status(resp.status_code)
+    finally:
+        # 超时、连接错误、5xx/429 都视为过载信号
+        CONCURRENCY.release(success)
+
+    resp.raise_for_status()
+    resp.encoding = encoding or detect_encoding(resp)
+    return resp.text
+
+
+@contextmanager
+def shared_fetch_cache():
+    """在 with 块内启用 URL 缓存：同一 URL 只下载一次，
+    并发请求同一 URL 时后来者等待第一次下载的结果；可嵌套，最外层退出时清空
+    """
+    global _fetch_cache
+    with _fetch_cache_lock:
+        is_outer = _fetch_cache is None
+        if is_outer:
+            _fetch_cache = {}
+    try:
+        yield
+    finally:
+        if is_outer:
+            with _fetch_cache_lock:
+                _fetch_cache = None
+
+
+def claim_fetch(url: str, encoding: Optional[str]) -> Tuple[Optional[Future], bool]:
+    """在 URL 缓存中登记一次请求，返回 (future, is_owner)；未启用缓存时返回 (None, False)
+    is_owner 为 True 时由调用方下载，并通过 settle_fetch 写入结果；否则等待 future 即可
+    """
+    with _fetch_cache_lock:
+        if _fetch_cache is None:
+            return None, False
+        key = (url, encoding)
+        future = _fetch_cache.get(key)
+        if future is not None:
+            return future, False
+        future = _fetch_cache[key] = Future()
+        return future, True
+
+
+def settle_fetch(url: str, encoding: Optional[str], future: Future,
+                 text: Optional[str] = None, error: Optional[BaseException] = None):
+    """写入 claim_fetch 登记的下载结果；失败不缓存，允许其他调用方重试"""
+    if error is not None:
+        with _fetch_cache_lock:
+            if _fetch_cache is not None and _fetch_cache.get((url, encoding)) is future:
+                del _fetch_cache[(url, encoding)]
+        future.set_exception(error)
+    else:
+        future.set_result(text)
+
+
+def fetch_text(url: str, timeout: float = REQUEST_TIMEOUT, encoding: Optional[str] = None) -> str:
+    """通过共享 Session 获取页面文本
+    encoding: 指定时直接按该编码解码，否则使用 detect_encoding
+    """
+    future, is_owner = claim_fetch(url, encoding)
+    if future is None:
+        return _fetch_text_uncached(url, timeout, encoding)
+    if not is_owner:
+        return future.result()
+
+    try:
+        text = _fetch_text_uncached(url, timeout, encoding)
+    except BaseException as e:
+        settle_fetch(url, encoding, future, error=e)
+        raise
+    settle_fetch(url, encoding, future, text=text)
+    return text
@@ -0,0 +1,147 @@
+"""
+抓取 / 解析流水线
+- 抓取阶段：I/O 线程池下载原始 HTML，放入有界队列（队列满时抓取线程阻塞，形成背压）
+- 解析阶段：进程池中的解析进程把 HTML 转为结构化数据，绕开 GIL
+parse_fn 会被发送到子进程执行，必须是模块级函数，签名为 parse_fn(key, html)
+"""
+import queue
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from ..config import FETCH_WORKERS, PARSE_WORKERS, PIPELINE_QUEUE_SIZE, REQUEST_TIMEOUT
+from .http import fetch_text
+
+logger = logging.getLogger(__name__)
+
+
+def fetch_and_parse(tasks: Dict[Hashable, str],
+                    parse_fn: Callable[[Hashable, str], Any],
+                    fetch_workers: int = FETCH_WORKERS,
+                    parse_workers: int = PARSE_WORKERS,
+                    queue_size: int = PIPELINE_QUEUE_SIZE,
+                    timeout: float = REQUEST_TIMEOUT,
+                    encoding: str = "utf-8",
+                    on_result: Optional[Callable[[Hashable, Any], None]] = None,
+                    cancel: Optional[threading.Event] = None) -> Dict[Hashable, Any]:
+    """抓取 tasks 中的每个 URL 并解析，返回 {key: parse_fn 结果}
+    抓取失败或解析结果为 None 的 key 不会出现在结果中
+    parse_workers <= 0 时在当前进程内解析；请求速率由 http.fetch_text 的全局限速器控制
+    on_result: 每得到一个结果即在调用线程中回调 on_result(key, result)（可用于断点保存），
+               回调抛出的异常会停止剩余抓取并原样抛出
+    解析进程池异常退出（BrokenProcessPool）时，剩余页面改为在当前进程内解析
+    cancel: 被 set 后尚未开始的请求直接跳过，返回已完成部分的结果
+    """
+    html_queue = queue.Queue(maxsize=queue_size)
+    results = {}
+    # 消费端出错时置位：抓取线程不再开始新请求，也不再阻塞在已满的队列上
+    stop = threading.Event()
+
+    def _put(item):
+        while not stop.is_set():
+            try:
+                html_queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _fetch(key, url):
+        if stop.is_set():
+            return
+        if cancel is not None and cancel.is_set():
+            _put((key, None))
+            return
+        try:
+            html = fetch_text(url, timeout=timeout, encoding=encoding)
+        except Exception as e:
+            logger.error(f"  ❌ 请求失败 {key}：{e}")
+            html = None
+        _put((key, html))
+
+    def _drain():
+        while True:
+            try:
+                html_queue.get_nowait()
+            except queue.Empty:
+                return
+
+    def _store(key, result):
+        if result is None:
+            return
+        results[key] = result
+        if on_result is not None:
+            on_result(key, result)
+
+    def _parse_local(key, html):
+        try:
+            result = parse_fn(key, html)
+        except Exception as e:
+            logger.error(f"  ❌ 解析失败 {key}：{e}")
+            return
+        _store(key, result)
+
+    def _collect(future, key, html):
+        try:
+            result = future.result()
+        except BrokenProcessPool:
+            # 解析进程异常退出，该页面改为在当前进程内解析
+            _parse_local(key, html)
+            return
+        except Exception as e:
+            logger.error(f"  ❌ 解析失败 {key}：{e}")
+            return
+        _store(key, result)
+
+    def _consume(cpu_pool):
+        pending = {}
+        for _ in range(len(tasks)):
+            key, html = html_queue.get()
+            if html is None:
+                continue
+            if cpu_pool is None:
+                _parse_local(key, html)
+                continue
+            try:
+                pending[cpu_pool.submit(parse_fn, key, html)] = (key, html)
+            except BrokenProcessPool as e:
+                logger.warning(f"⚠️ 解析进程池不可用，改为在当前进程内解析：{e}")
+                cpu_pool = None
+                _parse_local(key, html)
+                for future in list(pending):
+                    _collect(future, *pending.pop(future))
+                continue
+
+            # 限制进程池中排队的页面数，保持内存有界
+            if len(pending) >= parse_workers * 2:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    _collect(future, *pending.pop(future))
+
+        for future in list(pending):
+            _collect(future, *pending.pop(future))
+
+    io_pool = ThreadPoolExecutor(max_workers=fetch_workers)
+    try:
+        for key, url in tasks.items():
+            io_pool.submit(_fetch, key, url)
+
+        if parse_workers <= 0:
+            _consume(None)
+        else:
+            # 抓取线程已在运行，使用 spawn 避免 fork 时复制其持有的锁
+            mp_context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=parse_workers, mp_context=mp_context) as cpu_pool:
+                _consume(cpu_pool)
+    except BaseException:
+        # 回调（如断点写入）或进程池出错：停止抓取并清空队列，避免抓取线程永久阻塞
+        stop.set()
+        io_pool.shutdown(wait=False, cancel_futures=True)
+        _drain()
+        raise
+    finally:
+        io_pool.shutdown(wait=True)
+
+    return results
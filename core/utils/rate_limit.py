@@ -0,0 +1,109 @@
+"""
+全局限速
+- TokenBucket：令牌桶，限制整个进程对目标站点的请求速率（RATE_LIMIT_RPS，允许 RATE_LIMIT_BURST 突发）
+- AdaptiveConcurrency：AIMD 自适应并发，超时 / 5xx / 429 时并发上限减半，成功时缓慢加一
+两者均为进程级单例，所有抓取器、所有项目共用；同时支持线程与协程调用
+"""
+import time
+import asyncio
+import threading
+import logging
+
+from ..config import (
+    RATE_LIMIT_RPS, RATE_LIMIT_BURST,
+    ADAPTIVE_MIN_CONCURRENCY, ADAPTIVE_MAX_CONCURRENCY, ADAPTIVE_INITIAL_CONCURRENCY,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """线程安全的令牌桶"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = float(rate)
+        self.capacity = float(max(1, burst))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """预留一个令牌，返回需要等待的秒数（令牌可以“透支”，由等待时间偿还）"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self):
+        """阻塞直到拿到令牌"""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """协程版本的 acquire"""
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class AdaptiveConcurrency:
+    """AIMD 自适应并发上限"""
+
+    def __init__(self, min_limit: int, max_limit: int, initial: int):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self._limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self._in_flight = 0
+        self._cond = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def try_acquire(self) -> bool:
+        """尝试占用一个并发名额，不阻塞"""
+        with self._cond:
+            if self._in_flight < int(self._limit):
+                self._in_flight += 1
+                return True
+            return False
+
+    def acquire(self):
+        """阻塞直到占用一个并发名额"""
+        with self._cond:
+            while self._in_flight >= int(self._limit):
+                self._cond.wait()
+            self._in_flight += 1
+
+    async def acquire_async(self, poll_interval: float = 0.05):
+        """协程版本的 acquire（轮询，避免在事件循环中阻塞）"""
+        while not self.try_acquire():
+            await asyncio.sleep(poll_interval)
+
+    def release(self, success: bool = True):
+        """释放名额并根据结果调整上限：成功加性增长，失败乘性减半"""
+        with self._cond:
+            self._in_flight -= 1
+            if success:
+                self._limit = min(self.max_limit, self._limit + 1.0 / max(self._limit, 1.0))
+            else:
+                old = int(self._limit)
+                self._limit = max(self.min_limit, self._limit / 2)
+                if int(self._limit) != old:
+                    logger.warning(f"⚠️ 请求失败，并发上限降至 {int(self._limit)}")
+            self._cond.notify_all()
+
+
+def is_overload_status(status_code: int) -> bool:
+    """服务端过载/限流的响应码"""
+    return status_code == 429 or status_code >= 500
+
+
+RATE_LIMITER = TokenBucket(RATE_LIMIT_RPS, RATE_LIMIT_BURST)
+CONCURRENCY = AdaptiveConcurrency(ADAPTIVE_MIN_CONCURRENCY, ADAPTIVE_MAX_CONCURRENCY,
+                                  ADAPTIVE_INITIAL_CONCURRENCY)
@@ -0,0 +1,126 @@
+"""
+JSON 序列化
+统一所有 JSON 读写，按可用性使用 msgspec / orjson，都未安装时使用标准库 json：
+- 输出与 json.dumps(ensure_ascii=False, indent=...) 逐字节一致；indent 为 None 时等同 separators=(",", ":")
+  （msgspec / orjson 的指数形式浮点数 1e16、1e-7 会改写为标准库的 1e+16、1e-07，
+  内容哈希因此不随后端变化；NaN / Infinity 例外，两者编码为 null，标准库为 NaN）
+- 可直接编码 core.models 中的 dataclass，不需要先转换为字典
+- decode 可指定类型（如 Dict[str, BuildingData]），直接解码为模型对象；不指定类型时优先用 orjson
+"""
+import os
+import re
+import json
+import dataclasses
+import typing
+from typing import Any, Optional, Union
+
+try:
+    import msgspec
+    HAS_MSGSPEC = True
+except ImportError:
+    msgspec = None
+    HAS_MSGSPEC = False
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    orjson = None
+    HAS_ORJSON = False
+
+BACKEND = "msgspec" if HAS_MSGSPEC else "orjson" if HAS_ORJSON else "json"
+
+if HAS_MSGSPEC:
+    _encoder = msgspec.json.Encoder()
+    _decoders = {}
+
+
+# 字符串原样跳过；字符串之外的 e 只会出现在浮点数的指数部分（true / false 中的 e 后面不是数字）
+_EXPONENT_RE = re.compile(rb'"(?:[^"\\]|\\.)*"|e(-?)([0-9]+)')
+_HAS_EXPONENT_RE = re.compile(rb"[0-9]e-?[0-9]")
+
+
+def _stdlib_exponent(m: "re.Match") -> bytes:
+    if m.group(2) is None:
+        return m.group(0)
+    return b"e" + (m.group(1) or b"+") + m.group(2).zfill(2)
+
+
+def _normalize_floats(content: bytes) -> bytes:
+    """把指数形式的浮点数改写为标准库格式（1e16 -> 1e+16，1e-7 -> 1e-07）"""
+    if not _HAS_EXPONENT_RE.search(content):
+        return content
+    return _EXPONENT_RE.sub(_stdlib_exponent, content)
+
+
+def _default(obj):
+    if dataclasses.is_dataclass(obj):
+        return dataclasses.asdict(obj)
+    raise TypeError(f"无法序列化 {type(obj).__name__}")
+
+
+def dumps(obj: Any, indent: Optional[int] = None) -> bytes:
+    """编码为 UTF-8 JSON（indent 为 None 时输出紧凑格式）"""
+    if HAS_MSGSPEC:
+        content = _normalize_floats(_encoder.encode(obj))
+        return msgspec.json.format(content, indent=indent) if indent else content
+    if HAS_ORJSON and indent in (None, 2):
+        return _normalize_floats(orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0))
+
+    separators = None if indent else (",", ":")
+    return json.dumps(obj, ensure_ascii=False, indent=indent, separators=separators,
+                      default=_default).encode("utf-8")
+
+
+def _convert(value: Any, tp: Any) -> Any:
+    """把 json.loads 的结果按类型标注转换为模型对象（无 msgspec 时使用）"""
+    if dataclasses.is_dataclass(tp):
+        hints = typing.get_type_hints(tp)
+        return tp(**{f.name: _convert(value[f.name], hints[f.name])
+                     for f in dataclasses.fields(tp) if f.name in value})
+
+    origin, args = typing.get_origin(tp), typing.get_args(tp)
+    if value is None:
+        return None
+    if origin in (list, typing.List) and args:
+        return [_convert(v, args[0]) for v in value]
+    if origin in (dict, typing.Dict) and args:
+        return {k: _convert(v, args[1]) for k, v in value.items()}
+    if origin is Union:
+        for arg in args:
+            if arg is not type(None):
+                return _convert(value, arg)
+    return value
+
+
+def decode(content: Union[bytes, str], type: Any = None) -> Any:
+    """解码 JSON；指定 type 时直接解码为对应类型（例如 Dict[str, BuildingData]）"""
+    if type is None and HAS_ORJSON:
+        # 不指定类型时 orjson 解码最快
+        return orjson.loads(content)
+    if HAS_MSGSPEC:
+        if type is None:
+            return msgspec.json.decode(content)
+        decoder = _decoders.get(type)
+        if decoder is None:
+            decoder = _decoders[type] = msgspec.json.Decoder(type)
+        return decoder.decode(content)
+
+    data = orjson.loads(content) if HAS_ORJSON else json.loads(content)
+    return data if type is None else _convert(data, type)
+
+
+def load_file(path: str, type: Any = None) -> Any:
+    """读取 JSON 文件（可指定解码类型）"""
+    with open(path, "rb") as f:
+        return decode(f.read(), type)
+
+
+def dump_file(obj: Any, path: str, indent: Optional[int] = None, atomic: bool = False):
+    """写入 JSON 文件；atomic 为 True 时先写临时文件再替换"""
+    content = dumps(obj, indent)
+    target = path + ".tmp" if atomic else path
+    with open(target, "wb") as f:
+        f.write(content)
+    if atomic:
+        os.replace(target, path)
@@ -0,0 +1,91 @@
+"""
+解析后端一致性测试
+对保存的页面样本，lxml 后端的输出必须与 bs4 参考实现完全一致
+"""
+import os
+
+import pytest
+
+from core.config import STATUS_CODES, OTHER_CODE
+from core.parsers import bs4_backend
+from core.parsers.status_classifier import STATUS_CLASSIFIER
+from core.scrapers import status_scraper
+
+lxml_backend = pytest.importorskip("core.parsers.lxml_backend")
+
+PAGES_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "pages")
+PAGES = ("building.html", "house_detail.html", "list.html", "presale_stats.html")
+EXTRACTORS = ("building_cells", "anchors", "two_cell_rows", "presale_stats_rows")
+
+
+def load_page(name: str) -> str:
+    with open(os.path.join(PAGES_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("page", PAGES)
+@pytest.mark.parametrize("extractor", EXTRACTORS)
+def test_backends_agree(page, extractor):
+    html = load_page(page)
+    assert getattr(lxml_backend, extractor)(html) == getattr(bs4_backend, extractor)(html)
+
+
+def test_fixtures_exercise_each_extractor():
+    # 样本页面确实覆盖到各个提取函数，避免两边都返回空结果时一致性测试失去意义
+    assert len(bs4_backend.building_cells(load_page("building.html"))) == 10
+    assert ("/eportal/ui?pageId=373432&houseId=1001&systemId=2", "1-301") in bs4_backend.anchors(load_page("list.html"))
+    assert ("建筑面积：", "89.37平方米") in bs4_backend.two_cell_rows(load_page("house_detail.html"))
+    rows = bs4_backend.presale_stats_rows(load_page("presale_stats.html"))
+    assert rows[0] == ["用 途", "已签约套数", "已签约面积(M2)", "成交均价(￥/M2)"]
+    assert rows[1] == ["住宅", "312", "28,114.52", "64988.23"]
+
+
+def test_building_cells_without_table():
+    html = load_page("house_detail.html")
+    assert bs4_backend.building_cells(html) is None
+    assert lxml_backend.building_cells(html) is None
+
+
+def test_parse_building_html_same_for_both_backends(monkeypatch):
+    html = load_page("building.html")
+    results = {}
+    for backend in (bs4_backend, lxml_backend):
+        monkeypatch.setattr(status_scraper, "get_parser", lambda backend=backend: backend)
+        results[backend.__name__] = status_scraper.parse_building_html("5-12#住宅楼", html)
+
+    bs4_result, lxml_result = results.values()
+    assert bs4_result == lxml_result
+    assert [h.house_no for h in bs4_result.house_data] == [
+        "1-301", "1-302", "1-303", "1-201", "1-202", "1-203", "1-101", "1-102", "1-103",
+    ]
+    assert [h.status for h in bs4_result.house_data] == [
+        "已签约", "可售", "网上联机备案", "不可售", "资格核验中", "其他", "已预订", "已办理预售项目抵押", "其他",
+    ]
+
+
+@pytest.mark.parametrize("style, status", [
+    ("background:#FF0000", "已签约"),
+    ("background:#ff0000;float:left", "已签约"),
+    ("float:left;background:#33cc00", "可售"),
+    ("background:#CCC", "不可售"),
+    ("background: #0ff; width:50px", "资格核验中"),
+    ("BACKGROUND-COLOR: #ffcc99", "已预订"),
+    ("background:#FFFF00 url(/images/bg.gif) no-repeat", "已办理预售项目抵押"),
+])
+def test_classifier_known_colors(style, status):
+    assert STATUS_CLASSIFIER.classify(style) == STATUS_CODES[status]
+
+
+@pytest.mark.parametrize("style", [
+    "background:#123456",
+    "background:#abc",
+    "background:none",
+    "background:#FF00001",
+])
+def test_classifier_unknown_colors(style):
+    assert STATUS_CLASSIFIER.classify(style) == OTHER_CODE
+
+
+def test_classifier_without_background():
+    assert STATUS_CLASSIFIER.classify("float:left;width:50px") is None
+    assert STATUS_CLASSIFIER.classify_many(["float:left", "background:#f00"]) == [None, STATUS_CODES["已签约"]]